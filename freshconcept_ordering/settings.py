@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 
 
@@ -28,6 +29,9 @@ SECRET_KEY = os.environ.get('SECRET_KEY', '+@8%)%i2b!-pcjc&!$l#wm*c$9#0_nr+h-5nx
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.environ.get('DEBUG', 'False').lower() == 'true'
 
+# True when running "manage.py test"
+TESTING = sys.argv[1:2] == ['test']
+
 # Production hosts - Render will provide the domain
 ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
 
@@ -87,6 +91,11 @@ if os.environ.get('DATABASE_URL'):
     DATABASES = {
         'default': dj_database_url.parse(os.environ.get('DATABASE_URL'))
     }
+    # Clone the test database from a pre-migrated template instead of running migrations
+    if os.environ.get('TEST_DATABASE_TEMPLATE'):
+        DATABASES['default']['TEST'] = {
+            'TEMPLATE': os.environ.get('TEST_DATABASE_TEMPLATE'),
+        }
 else:
     # Fallback for build process
     DATABASES = {
@@ -96,6 +105,16 @@ else:
         }
     }
 
+# Quick local test runs: in-memory SQLite even when DATABASE_URL points at PostgreSQL.
+# PostgreSQL-only indexes and admin full-text search are skipped on SQLite.
+if TESTING and os.environ.get('TEST_SQLITE', 'False').lower() == 'true':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        }
+    }
+
 # Cache configuration for Redis
 if os.environ.get('REDIS_URL'):
     CACHES = {
@@ -126,6 +145,12 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Tests create many users; skip the deliberately slow production hasher there
+if TESTING:
+    PASSWORD_HASHERS = [
+        "django.contrib.auth.hashers.MD5PasswordHasher",
+    ]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -164,6 +189,8 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = 'orders.User'
 
+AUTHENTICATION_BACKENDS = ['orders.backends.CustomerProfileBackend']
+
 LOGIN_URL = '/login/'
 LOGOUT_REDIRECT_URL = '/login/'
 
@@ -1,6 +1,56 @@
+import re
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connections
+from django.db.models import Func, JSONField, Q
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Customer, Product, Order, OrderItem
+from .models import DAY_NAMES, User, Customer, Product, Order, OrderItem
+from .paginator import EstimatedCountPaginator
+
+
+class JSONObjectKeys(Func):
+    """
+    Top-level keys of a JSON object as a JSON array, extracted by the database.
+    
+    NULL for arrays and scalars, which PostgreSQL's jsonb_object_keys() rejects.
+    """
+    output_field = JSONField()
+
+    def _as_sql(self, compiler, connection, type_check, keys_query):
+        sql, params = compiler.compile(self.get_source_expressions()[0])
+        template = f'CASE WHEN {type_check} THEN ({keys_query}) END'
+        return template.format(value=sql), (*params, *params)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self._as_sql(
+            compiler, connection,
+            type_check="jsonb_typeof({value}) = 'object'",
+            keys_query='SELECT jsonb_agg(key) FROM jsonb_object_keys({value}) AS key',
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self._as_sql(
+            compiler, connection,
+            type_check="json_type({value}) = 'object'",
+            keys_query='SELECT json_group_array(key) FROM json_each({value})',
+        )
+
+
+class CustomerChangeList(ChangeList):
+    """
+    Customer change list that fetches only the delivery day keys instead of
+    decoding each full schedule in Python.
+    
+    Kept out of CustomerAdmin.get_queryset so the change form still loads the
+    schedule it edits in the same query.
+    """
+
+    def get_queryset(self, request, exclude_parameters=None):
+        return super().get_queryset(request, exclude_parameters).annotate(
+            delivery_days=JSONObjectKeys('delivery_schedule'),
+        ).defer('delivery_schedule')
+
 
 class CustomUserAdmin(UserAdmin):
     """Custom User admin with role field support."""
@@ -45,7 +95,7 @@ class CustomerAdmin(admin.ModelAdmin):
     """
     list_display = ['customer_number', 'company_name', 'contact_person', 'user', 'phone_number', 'delivery_schedule_display']
     list_filter = ['created_at']
-    search_fields = ['customer_number', 'company_name', 'contact_person', 'user__username', 'user__email']
+    search_fields = ['=customer_number', 'company_name', 'contact_person', 'user__username', 'user__email']
     readonly_fields = ['created_at', 'updated_at']
     ordering = ['company_name']
     
@@ -69,14 +119,47 @@ class CustomerAdmin(admin.ModelAdmin):
         })
     )
     
+    def get_changelist(self, request, **kwargs):
+        return CustomerChangeList
+    
     def delivery_schedule_display(self, obj):
         """Display delivery schedule in human-readable format."""
-        try:
-            days = obj.get_delivery_days_display()
-            return ', '.join(days) if days else 'No delivery days set'
-        except (AttributeError, IndexError, TypeError):
+        # Keys that aren't a weekday number (0-6) are skipped
+        days = sorted({int(day) for day in obj.delivery_days or () if day.isdecimal() and int(day) < len(DAY_NAMES)})
+        if not days:
             return 'No delivery days set'
+        return ', '.join(DAY_NAMES[day] for day in days)
     delivery_schedule_display.short_description = 'Delivery Days'
+    
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Use PostgreSQL full-text search instead of one LIKE '%term%' scan per search field.
+        
+        The vector matches the cust_search_gin expression index (migration 0004). Every
+        word is matched as a prefix, and exact customer number, username and email
+        matches are kept as fast paths. Each kind of match is a separate query whose
+        customer ids are combined with UNION: an OR spanning the joined user table
+        would stop PostgreSQL from using the index. Username and email are only
+        matched exactly here, not as substrings.
+        Other databases fall back to the default admin search.
+        """
+        words = re.findall(r'\w+', search_term)
+        if not words or connections[queryset.db].vendor != 'postgresql':
+            return super().get_search_results(request, queryset, search_term)
+        
+        search_term = search_term.strip()
+        query = SearchQuery(' & '.join(f'{word}:*' for word in words), config='simple', search_type='raw')
+        customers = Customer.objects.using(queryset.db)
+        users = User.objects.using(queryset.db).filter(
+            Q(username__iexact=search_term) | Q(email__iexact=search_term)
+        )
+        matching_ids = customers.annotate(
+            search=SearchVector('company_name', 'contact_person', 'customer_number', config='simple'),
+        ).filter(search=query).values('pk').union(
+            customers.filter(customer_number__iexact=search_term).values('pk'),
+            customers.filter(user__in=users.values('pk')).values('pk'),
+        )
+        return queryset.filter(pk__in=matching_ids), False
 
 
 @admin.register(Product)
@@ -87,46 +170,40 @@ class ProductAdmin(admin.ModelAdmin):
     readonly_fields = ['get_wholesale_price', 'get_retail_price', 'get_price_per_kg_retail_display', 'created_at', 'updated_at']
     ordering = ['name']
 
+    def get_queryset(self, request):
+        """Compute prices in SQL so the price columns can be sorted by the database."""
+        return super().get_queryset(request).with_prices()
+
     def get_price_per_kg_display(self, obj):
         """Display the price per kg with currency symbol."""
-        try:
-            if obj.price_per_kg:
-                return f"€{obj.price_per_kg}"
-            return "€0.00"
-        except (AttributeError, TypeError):
-            return "€0.00"
+        if obj.price_per_kg:
+            return f"€{obj.price_per_kg}"
+        return "€0.00"
     get_price_per_kg_display.short_description = 'Price per KG'
 
     def get_price_per_kg_retail_display(self, obj):
         """Display the retail price per kg with currency symbol."""
-        try:
-            if obj.price_per_kg_retail:
-                return f"€{obj.price_per_kg_retail}"
-            return "€0.00"
-        except (AttributeError, TypeError):
-            return "€0.00"
+        if obj.price_per_kg_retail:
+            return f"€{obj.price_per_kg_retail}"
+        return "€0.00"
     get_price_per_kg_retail_display.short_description = 'Retail Price per KG'
     
     
     def get_wholesale_price(self, obj):
         """Display the calculated wholesale price."""
-        try:
-            if obj.wholesale_price:
-                return f"€{obj.wholesale_price}"
-            return "€0.00"
-        except (AttributeError, TypeError):
-            return "€0.00"
+        if obj.wholesale_price:
+            return f"€{obj.wholesale_price}"
+        return "€0.00"
     get_wholesale_price.short_description = 'Wholesale Price'
+    get_wholesale_price.admin_order_field = 'annotated_wholesale_price'
     
     def get_retail_price(self, obj):
         """Display the calculated retail price."""
-        try:
-            if obj.retail_price:
-                return f"€{obj.retail_price}"
-            return "€0.00"
-        except (AttributeError, TypeError):
-            return "€0.00"
+        if obj.retail_price:
+            return f"€{obj.retail_price}"
+        return "€0.00"
     get_retail_price.short_description = 'Retail Price'
+    get_retail_price.admin_order_field = 'annotated_retail_price'
 
 
 class OrderItemInline(admin.TabularInline):
@@ -139,31 +216,37 @@ class OrderItemInline(admin.TabularInline):
 class OrderAdmin(admin.ModelAdmin):
     list_display = ['id', 'customer', 'order_date', 'delivery_date', 'status', 'get_total_amount', 'get_total_items']
     list_filter = ['status', 'order_date', 'delivery_date', 'created_at']
-    search_fields = ['customer__company_name', 'customer__customer_number']
+    search_fields = ['customer__company_name', '=customer__customer_number']
     readonly_fields = ['order_date', 'delivery_date', 'created_at', 'updated_at']
     inlines = [OrderItemInline]
     ordering = ['-order_date']
+    list_select_related = ('customer',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    def get_queryset(self, request):
+        """Compute order totals in the same query as the change list rows."""
+        return super().get_queryset(request).with_totals()
     
     def get_total_amount(self, obj):
         """Display the calculated total amount."""
-        try:
-            return f"€{obj.total_amount}"
-        except (AttributeError, TypeError):
-            return "€0.00"
+        return f"€{obj.total_amount}"
     get_total_amount.short_description = 'Total Amount'
+    get_total_amount.admin_order_field = '_total_amount'
     
     def get_total_items(self, obj):
         """Display the calculated total items."""
-        try:
-            return obj.total_items
-        except (AttributeError, TypeError):
-            return 0
+        return obj.total_items
     get_total_items.short_description = 'Total Items'
+    get_total_items.admin_order_field = '_total_items'
 
 
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ['order', 'product', 'quantity', 'unit_price', 'total_price']
     list_filter = ['order__status', 'order__order_date']
-    search_fields = ['order__customer__company_name', 'product__name']
+    search_fields = ['order__customer__company_name', '=order__customer__customer_number', 'product__name']
     readonly_fields = ['unit_price', 'total_price']
+    list_select_related = ('order__customer', 'product')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,20 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+
+class CustomerProfileBackend(ModelBackend):
+    """
+    ModelBackend that loads the user's customer profile along with the session user.
+    
+    Customer views read request.user.customer_profile on every request; joining it
+    here saves a query per request. Users without a profile still raise
+    Customer.DoesNotExist when it is accessed.
+    """
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related('customer_profile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,38 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Product
+
+ACTIVE_PRODUCTS_CACHE_KEY = 'active_products_v1'
+# Upper bound on staleness for changes that bypass signals, such as queryset.update()
+ACTIVE_PRODUCTS_TIMEOUT = 300
+
+
+def _load_active_products():
+    # Only the columns the bulk order form displays
+    return list(Product.objects.filter(is_active=True).only(
+        'id', 'name', 'price_per_kg', 'approximate_weight', 'retail_price_override', 'margin_rate', 'minimum_quantity',
+    ))
+
+
+def get_active_products():
+    """
+    Active products for the bulk order form, cached until a product is saved or deleted.
+    
+    Each call returns its own list, so callers may set attributes on the products.
+    """
+    return cache.get_or_set(ACTIVE_PRODUCTS_CACHE_KEY, _load_active_products, ACTIVE_PRODUCTS_TIMEOUT)
+
+
+def clear_active_products():
+    """Drop the cached list so the next get_active_products() call reloads it."""
+    cache.delete(ACTIVE_PRODUCTS_CACHE_KEY)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_active_products(sender, **kwargs):
+    # Wait for the commit, or a concurrent request could cache the old rows again
+    transaction.on_commit(clear_active_products)
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-15 06:12
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_order_delivery_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(django.db.models.functions.text.Upper('customer_number'), name='cust_number_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['company_name'], name='cust_company_idx'),
+        ),
+    ]
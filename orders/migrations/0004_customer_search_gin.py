@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+# Must stay identical to the SearchVector built in CustomerAdmin.get_search_results,
+# otherwise PostgreSQL will not use the index for admin searches.
+CREATE_SEARCH_INDEX = """
+CREATE INDEX IF NOT EXISTS cust_search_gin ON orders_customer USING gin (
+    to_tsvector('simple'::regconfig,
+        COALESCE(company_name, '') || ' ' || COALESCE(contact_person, '') || ' ' || COALESCE(customer_number, ''))
+)
+"""
+
+DROP_SEARCH_INDEX = "DROP INDEX IF EXISTS cust_search_gin"
+
+
+def create_search_index(apps, schema_editor):
+    """Full-text search is PostgreSQL only; other databases keep the default admin search."""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_SEARCH_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEARCH_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_customer_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
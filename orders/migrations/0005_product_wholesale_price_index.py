@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-15 06:15
+
+import django.db.models.expressions
+import django.db.models.functions.math
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_customer_search_gin'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(django.db.models.functions.math.Round(django.db.models.expressions.CombinedExpression(models.F('price_per_kg'), '*', models.F('approximate_weight')), 2), name='product_wholesale_idx'),
+        ),
+    ]
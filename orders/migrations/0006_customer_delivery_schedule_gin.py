@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+CREATE_DELIVERY_INDEX = "CREATE INDEX IF NOT EXISTS cust_delivery_gin ON orders_customer USING gin (delivery_schedule)"
+
+DROP_DELIVERY_INDEX = "DROP INDEX IF EXISTS cust_delivery_gin"
+
+
+def create_delivery_index(apps, schema_editor):
+    """GIN indexes on jsonb are PostgreSQL only; has_key lookups still work elsewhere."""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_DELIVERY_INDEX)
+
+
+def drop_delivery_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_DELIVERY_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_product_wholesale_price_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_delivery_index, drop_delivery_index),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-15 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_customer_delivery_schedule_gin'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', 'delivery_date'], name='order_cust_deliv_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'order_date'], name='order_status_date_idx'),
+        ),
+    ]
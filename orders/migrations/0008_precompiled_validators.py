@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-15 06:23
+
+import django.core.validators
+import re
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_order_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customer',
+            name='phone_number',
+            field=models.CharField(max_length=15, unique=True, validators=[django.core.validators.RegexValidator(re.compile('^(\\+32|0)[1-9][0-9]{7,8}$'), 'Phone number must be a valid Belgian number')]),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='vat_number',
+            field=models.CharField(blank=True, max_length=10, null=True, unique=True, validators=[django.core.validators.RegexValidator(re.compile('^[01][0-9]{9}$'), 'Belgian VAT number must be 10 digits starting with 0 or 1')]),
+        ),
+    ]
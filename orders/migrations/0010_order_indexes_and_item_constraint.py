@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-15 06:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_anchor_validators_at_end'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', '-order_date'], name='order_cust_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='orderitem',
+            constraint=models.UniqueConstraint(fields=('order', 'product'), name='orderitem_order_product_uniq'),
+        ),
+        # Dropped only once the new constraint enforces uniqueness
+        migrations.AlterUniqueTogether(
+            name='orderitem',
+            unique_together=set(),
+        ),
+    ]
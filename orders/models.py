@@ -12,13 +12,75 @@ Models:
     - OrderItem: Individual products in each order
 """
 
+import re
+from bisect import bisect_right
 from django.db import models
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, NullIf, Round, Upper
 from django.core.validators import RegexValidator
-from decimal import Decimal
+from decimal import ROUND_HALF_UP, Decimal
 from django.contrib.auth.models import AbstractUser
-from datetime import datetime, timedelta
+from django.utils.functional import cached_property
+from datetime import datetime, time, timedelta
 
-class User(AbstractUser):
+
+EMPLOYEE_ROLES = frozenset({'employee', 'admin'})
+
+CENT = Decimal('0.01')
+
+DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+def _to_cents(amount):
+    """Convert an amount with two decimal places to integer cents."""
+    if not isinstance(amount, Decimal):
+        # Go through str() so floats such as 2.5 keep their written value
+        amount = Decimal(str(amount))
+    return int(amount.scaleb(2).to_integral_value())
+
+
+def _round_money(amount):
+    """Round to cents half away from zero, like ROUND() in PostgreSQL."""
+    return amount.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _from_cents(cents):
+    """Convert integer cents back to a two-decimal Decimal amount."""
+    return Decimal(cents).scaleb(-2)
+
+
+def _parse_deadline(value):
+    """Parse an 'HH:MM' deadline; time.fromisoformat is far cheaper than strptime."""
+    try:
+        return time.fromisoformat(value)
+    except ValueError:
+        # Accept non zero-padded hours such as '8:00'
+        return datetime.strptime(value, '%H:%M').time()
+
+
+class CachedPropertiesMixin:
+    """
+    Drops per-instance cached_property values when the row is saved or reloaded.
+    
+    Models list the cached attributes derived from their fields in `cached_properties`.
+    Assigning a field directly does not clear them; save() or refresh_from_db() does.
+    """
+    cached_properties = ()
+
+    def clear_cached_properties(self):
+        for name in self.cached_properties:
+            self.__dict__.pop(name, None)
+
+    def save(self, *args, **kwargs):
+        self.clear_cached_properties()
+        super().save(*args, **kwargs)
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.clear_cached_properties()
+
+
+class User(CachedPropertiesMixin, AbstractUser):
     """
     Custom user model extending Django's AbstractUser with role-based access control.
     
@@ -36,18 +98,20 @@ class User(AbstractUser):
     ]
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='customer')
 
+    cached_properties = ('is_customer', 'is_employee', 'is_admin')
+
     def __str__(self):
         return f'{self.username} - {self.get_role_display()}'
 
-    @property
+    @cached_property
     def is_customer(self):
         return self.role == 'customer'
     
-    @property
+    @cached_property
     def is_employee(self):
-        return self.role in ['employee', 'admin']
+        return self.role in EMPLOYEE_ROLES
     
-    @property
+    @cached_property
     def is_admin(self):
         return self.role == 'admin'
     
@@ -65,7 +129,7 @@ class User(AbstractUser):
         return self._create_user(username, email, password, **extra_fields)
 
 
-class Customer(models.Model):
+class Customer(CachedPropertiesMixin, models.Model):
     """
     GMS locations/stores (supermarkets, retail chains) that place orders with FreshConcept.
     
@@ -79,18 +143,22 @@ class Customer(models.Model):
         - Example: {"1": ["0", "08:00"]} means Tuesday delivery, order by Monday 8 AM
     """
     
-    # Belgian VAT number validator (10 digits starting with 0 or 1)
+    # Belgian VAT number validator (10 digits starting with 0 or 1).
+    # Patterns are compiled at import and use [0-9] so only ASCII digits match.
+    # \Z rather than $ so a trailing newline is rejected.
     vat_validator = RegexValidator(
-        r"^[01]\d{9}$", 
+        re.compile(r"^[01][0-9]{9}\Z"), 
         "Belgian VAT number must be 10 digits starting with 0 or 1"
     )
 
     # Belgian phone number validator (including GSM)
     phone_validator = RegexValidator(
-        r"^(\+32|0)[1-9]\d{7,8}$", 
+        re.compile(r"^(\+32|0)[1-9][0-9]{7,8}\Z"), 
         "Phone number must be a valid Belgian number"
     )
 
+    cached_properties = ('_parsed_schedule', '_sorted_delivery_days', 'next_delivery_info')
+
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='customer_profile')
     customer_number = models.CharField(max_length=20, unique=True)
     company_name = models.CharField(max_length=255)
@@ -117,53 +185,84 @@ class Customer(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Admin '=customer_number' searches compare UPPER() values (iexact)
+            models.Index(Upper('customer_number'), name='cust_number_upper_idx'),
+            models.Index(fields=['company_name'], name='cust_company_idx'),
+        ]
+
     def __str__(self):
         return f"{self.customer_number} - {self.company_name.title()}"
 
+    @classmethod
+    def for_delivery_day(cls, day):
+        """Customers delivered on the given weekday (0=Monday), backed by the cust_delivery_gin index."""
+        return cls.objects.filter(delivery_schedule__has_key=str(day))
+
+    @cached_property
+    def _parsed_schedule(self):
+        """delivery_schedule parsed once: {delivery_day: (order_day, deadline_time)}."""
+        return {
+            int(day): (int(order_day), _parse_deadline(deadline_time))
+            for day, (order_day, deadline_time) in self.delivery_schedule.items()
+        }
+
+    @cached_property
+    def _sorted_delivery_days(self):
+        """Delivery day indexes (0=Monday) in ascending order."""
+        return tuple(sorted(int(day) for day in self.delivery_schedule))
+
     def get_delivery_days_display(self):
         """Get human-readable delivery days."""
-        day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        return [day_names[int(day)] for day in self.delivery_schedule.keys()]
+        return [DAY_NAMES[day] for day in self._sorted_delivery_days]
     
     def get_next_delivery_day_info(self):
         """
         Returns a tuple: (day_index, day_name, date)
         """
-        from datetime import datetime, timedelta
-        day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        today = datetime.now().weekday()
-        delivery_days = [int(day) for day in self.delivery_schedule.keys()]
+        delivery_days = self._sorted_delivery_days
         if not delivery_days:
             return None, None, None
-        delivery_days.sort()
-        for day in delivery_days:
-            if day > today:
-                days_until = day - today
-                next_date = datetime.now() + timedelta(days=days_until)
-                return day, day_names[day], next_date
-        # If no days left this week, return the first delivery day next week
-        days_until = (7 - today) + delivery_days[0]
-        next_date = datetime.now() + timedelta(days=days_until)
-        return delivery_days[0], day_names[delivery_days[0]], next_date
+        now = datetime.now()
+        today = now.weekday()
+        # First delivery day strictly after today
+        index = bisect_right(delivery_days, today)
+        if index < len(delivery_days):
+            day = delivery_days[index]
+            days_until = day - today
+        else:
+            # If no days left this week, return the first delivery day next week
+            day = delivery_days[0]
+            days_until = (7 - today) + day
+        next_date = now + timedelta(days=days_until)
+        return day, DAY_NAMES[day], next_date
+
+    @cached_property
+    def next_delivery_info(self):
+        """
+        get_next_delivery_day_info() computed once per instance.
+        
+        The date is relative to the first access, so only use this on short-lived
+        instances such as request.user.customer_profile.
+        """
+        return self.get_next_delivery_day_info()
 
     def can_order_for_delivery(self, delivery_day):
         """Check if customer can still order for a specific delivery day."""
-        from datetime import datetime
-        
         if str(delivery_day) not in self.delivery_schedule:
             return False
         
-        order_day, deadline_time = self.delivery_schedule[str(delivery_day)]
-        today = datetime.now().weekday()
+        order_day, deadline = self._parsed_schedule[int(delivery_day)]
+        now = datetime.now()
+        today = now.weekday()
         
         # If today is the order day, check if deadline has passed
-        if today == int(order_day):
-            current_time = datetime.now().time()
-            deadline = datetime.strptime(deadline_time, '%H:%M').time()
-            return current_time < deadline
+        if today == order_day:
+            return now.time() < deadline
         
         # If today is after the order day, it's too late
-        elif today > int(order_day):
+        elif today > order_day:
             return False
         
         # If today is before the order day, still have time
@@ -175,17 +274,38 @@ class Customer(models.Model):
         Get existing order for a specific delivery date.
         Returns the order if it exists, None otherwise.
         """
-        try:
-            return self.orders.filter(delivery_date=delivery_date).first()
-        except:
-            return None
+        return self.orders.filter(delivery_date=delivery_date).first()
+
 
+# SQL counterparts of Product.wholesale_price / retail_price, used for filtering,
+# ordering and aggregating in the database.
+WHOLESALE_PRICE_SQL = Round(F('price_per_kg') * F('approximate_weight'), 2)
+RETAIL_PRICE_SQL = Coalesce(
+    NullIf(F('retail_price_override'), Value(Decimal('0.00'))),
+    Round(F('price_per_kg') * F('approximate_weight') * Value(Decimal('1.06')) * (Value(Decimal('1')) + F('margin_rate')), 2),
+)
 
-class Product(models.Model):
+
+class ProductQuerySet(models.QuerySet):
+    def with_prices(self):
+        """Annotate wholesale and retail prices computed by the database."""
+        return self.annotate(
+            annotated_wholesale_price=models.ExpressionWrapper(
+                WHOLESALE_PRICE_SQL, output_field=DecimalField(max_digits=10, decimal_places=2)
+            ),
+            annotated_retail_price=models.ExpressionWrapper(
+                RETAIL_PRICE_SQL, output_field=DecimalField(max_digits=10, decimal_places=2)
+            ),
+        )
+
+
+class Product(CachedPropertiesMixin, models.Model):
     """
     Charcuterie products available from FreshConcept.
     """
     
+    cached_properties = ('wholesale_price', 'wholesale_price_cents', 'retail_price', 'price_per_kg_retail')
+    
     name = models.CharField(max_length=255)
     description = models.TextField()
     price_per_kg = models.DecimalField(
@@ -210,14 +330,26 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    @property
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(WHOLESALE_PRICE_SQL, name='product_wholesale_idx'),
+        ]
+
+    @cached_property
     def wholesale_price(self):
         """Calculate wholesale price based on price per kg and weight."""
         if not self.price_per_kg or not self.approximate_weight:
             return Decimal('0.00')
-        return round(self.price_per_kg * self.approximate_weight, 2)
+        return _round_money(self.price_per_kg * self.approximate_weight)
 
-    @property
+    @cached_property
+    def wholesale_price_cents(self):
+        """Wholesale price in integer cents, for pricing order lines with int arithmetic."""
+        return _to_cents(self.wholesale_price)
+
+    @cached_property
     def retail_price(self):
         """Calculate retail price with margin or return manual override."""
         if self.retail_price_override:
@@ -226,30 +358,45 @@ class Product(models.Model):
         if not self.price_per_kg or not self.approximate_weight:
             return Decimal('0.00')
         wholesale_total = self.price_per_kg * self.approximate_weight
-        return round(wholesale_total * Decimal("1.06") * (Decimal("1") + self.margin_rate), 2)
+        return _round_money(wholesale_total * Decimal("1.06") * (Decimal("1") + self.margin_rate))
 
-    @property
+    @cached_property
     def price_per_kg_retail(self):
         """Calculate retail price per kilogram."""
         if self.retail_price_override and self.approximate_weight:
-            return round(self.retail_price_override / self.approximate_weight, 2)
+            return _round_money(self.retail_price_override / self.approximate_weight)
         # Calculate: price_per_kg × 1.06 × (1 + margin)
         if not self.price_per_kg:
             return Decimal('0.00')
-        return round(self.price_per_kg * Decimal("1.06") * (Decimal("1") + self.margin_rate), 2)
+        return _round_money(self.price_per_kg * Decimal("1.06") * (Decimal("1") + self.margin_rate))
 
     def __str__(self):
         weight = f"{self.approximate_weight}kg" if self.approximate_weight else "No weight set"
         return f"{self.name} - {weight}"
 
     def quantities_for_orders(self, order_ids):
-        # Get all order items for these orders
-        items = self.order_items.filter(order_id__in=order_ids)
-        # Map order_id to quantity
-        qty_map = {item.order_id: item.quantity for item in items}
+        # Materialize once in case a QuerySet or generator is passed
+        order_ids = list(order_ids)
+        # Map order_id to quantity straight from the rows, without building OrderItem instances
+        qty_map = dict(self.order_items.filter(order_id__in=order_ids).values_list('order_id', 'quantity'))
         # Return quantities in the same order as order_ids
         return [qty_map.get(order_id, 0) for order_id in order_ids]
 
+class OrderQuerySet(models.QuerySet):
+    def with_totals(self):
+        """
+        Annotate order totals so total_amount / total_items need no extra query per order.
+        
+        Correlated subqueries rather than a JOIN + GROUP BY, so count() on the
+        annotated queryset drops them and stays a plain COUNT on orders_order.
+        """
+        items = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order')
+        return self.annotate(
+            _total_amount=Subquery(items.annotate(total=Sum('total_price')).values('total')),
+            _total_items=Subquery(items.annotate(total=Sum('quantity')).values('total')),
+        )
+
+
 class Order(models.Model):
     """
     Purchase orders from GMS customers to FreshConcept charcuterie supplier.
@@ -269,12 +416,26 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = OrderQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            # Customer.get_existing_order_for_delivery_date
+            models.Index(fields=['customer', 'delivery_date'], name='order_cust_deliv_idx'),
+            # Last orders of a customer in bulk_order_form
+            models.Index(fields=['customer', '-order_date'], name='order_cust_date_idx'),
+            # OrderAdmin status / order date filters
+            models.Index(fields=['status', 'order_date'], name='order_status_date_idx'),
+        ]
+    
     @property
     def total_amount(self):
         """Calculate total amount from order items."""
         if not self.pk:
             return Decimal('0.00')
-        return sum(item.total_price for item in self.order_items.all())
+        if hasattr(self, '_total_amount'):  # Annotated by Order.objects.with_totals()
+            return self._total_amount or Decimal('0.00')
+        return self.order_items.aggregate(total=Sum('total_price'))['total'] or Decimal('0.00')
     
     def __str__(self):
         return f"Order {self.id} - {self.customer.company_name}"
@@ -284,7 +445,9 @@ class Order(models.Model):
         """Calculate total number of items in the order."""
         if not self.pk:
             return 0
-        return sum(item.quantity for item in self.order_items.all())
+        if hasattr(self, '_total_items'):  # Annotated by Order.objects.with_totals()
+            return self._total_items or 0
+        return self.order_items.aggregate(total=Sum('quantity'))['total'] or 0
 
 
 class OrderItem(models.Model):
@@ -299,7 +462,10 @@ class OrderItem(models.Model):
     total_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     
     class Meta:
-        unique_together = ['order', 'product']
+        constraints = [
+            # Its index also serves lookups of an order's items
+            models.UniqueConstraint(fields=['order', 'product'], name='orderitem_order_product_uniq'),
+        ]
     
     def save(self, *args, **kwargs):
         """Auto-calculate unit_price and total_price if not set."""
@@ -307,7 +473,7 @@ class OrderItem(models.Model):
             if not self.unit_price and hasattr(self.product, 'wholesale_price'):
                 self.unit_price = self.product.wholesale_price
             if not self.total_price and self.unit_price:
-                self.total_price = self.quantity * self.unit_price
+                self.total_price = _from_cents(self.quantity * _to_cents(self.unit_price))
         except (AttributeError, TypeError):
             # If we can't calculate prices, set defaults
             if not self.unit_price:
@@ -316,6 +482,64 @@ class OrderItem(models.Model):
                 self.total_price = Decimal('0.00')
         super().save(*args, **kwargs)
     
+    @classmethod
+    def bulk_create_items(cls, order, items):
+        """
+        Create the order's items in a single INSERT.
+        
+        `items` is an iterable of (product_id, quantity) pairs. Prices are calculated
+        the same way as in save(), which bulk_create() bypasses.
+        """
+        items = list(items)
+        products = Product.objects.in_bulk([product_id for product_id, _ in items])
+        order_items = [
+            cls(order=order, product_id=product_id, quantity=quantity, **cls._prices(products[product_id], quantity))
+            for product_id, quantity in items
+        ]
+        return cls.objects.bulk_create(order_items, batch_size=500)
+    
+    @classmethod
+    def replace_items(cls, order, items):
+        """
+        Make the order's items match `items`, writing only the rows that change.
+        
+        `items` is an iterable of (product_id, quantity) pairs, as for bulk_create_items().
+        Items of products not listed are deleted, existing items are updated only if
+        their quantity or prices differ, and the remaining products get new items.
+        """
+        quantities = dict(items)
+        existing = {item.product_id: item for item in order.order_items.all()}
+        products = Product.objects.in_bulk(list(quantities))
+        
+        removed = existing.keys() - quantities.keys()
+        if removed:
+            order.order_items.filter(product_id__in=removed).delete()
+        
+        changed = []
+        new_items = []
+        for product_id, quantity in quantities.items():
+            prices = cls._prices(products[product_id], quantity)
+            item = existing.get(product_id)
+            if item is None:
+                new_items.append(cls(order=order, product_id=product_id, quantity=quantity, **prices))
+            elif (item.quantity, item.unit_price, item.total_price) != (quantity, prices['unit_price'], prices['total_price']):
+                item.quantity = quantity
+                item.unit_price = prices['unit_price']
+                item.total_price = prices['total_price']
+                changed.append(item)
+        if changed:
+            cls.objects.bulk_update(changed, ['quantity', 'unit_price', 'total_price'], batch_size=500)
+        if new_items:
+            cls.objects.bulk_create(new_items, batch_size=500)
+    
+    @staticmethod
+    def _prices(product, quantity):
+        """Unit and total price of `quantity` x `product`, calculated as in save()."""
+        return {
+            'unit_price': product.wholesale_price,
+            'total_price': _from_cents(quantity * product.wholesale_price_cents),
+        }
+    
     def __str__(self):
         return f"{self.quantity}x {self.product.name} - €{self.total_price}"
         
\ No newline at end of file
@@ -0,0 +1,35 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that uses PostgreSQL's row estimate for unfiltered querysets.
+    
+    COUNT(*) on a large table is a full scan. pg_class.reltuples is kept up to date
+    by VACUUM/ANALYZE and is close enough for paging through an admin change list.
+    Filtered querysets, small tables and other databases still get an exact count.
+    """
+    # Below this many rows an exact COUNT(*) is cheap and the estimate may be stale
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None or query.where:
+            return super().count
+        
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql':
+            return super().count
+        
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                [self.object_list.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row is None or row[0] < self.exact_count_threshold:
+            return super().count
+        return row[0]
@@ -11,10 +11,8 @@ def dict_get(d, key):
 
 @register.filter
 def list_get(l, index):
-    """Get value from list by index, return None if not found."""
-    if l is None or not isinstance(l, list):
-        return None
+    """Get value from list (or any sequence) by index, return None if not found."""
     try:
         return l[index]
-    except (IndexError, TypeError):
+    except (IndexError, KeyError, TypeError):
         return None
\ No newline at end of file
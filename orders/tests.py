@@ -1,26 +1,94 @@
-from django.test import TestCase, Client
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.urls import reverse
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Sum
+from django.urls import resolve, reverse
+import itertools
 from decimal import Decimal
-from datetime import date
+from datetime import date, datetime
+from unittest import mock
+from .caching import ACTIVE_PRODUCTS_CACHE_KEY
 from .models import User, Customer, Product, Order, OrderItem
+from .paginator import EstimatedCountPaginator
+
+# Hash the shared test password once instead of once per user
+TEST_PASSWORD_HASH = make_password('testpass123')
+
+# Pricing shared by the generic test products, parsed once at import
+PRODUCT_1_PRICING = {'price_per_kg': Decimal('10.00'), 'approximate_weight': Decimal('0.100')}  # €1.00 wholesale
+PRODUCT_2_PRICING = {'price_per_kg': Decimal('20.00'), 'approximate_weight': Decimal('0.200')}  # €4.00 wholesale
+
+# Source of unique numbers for create_customer()
+_customer_sequence = itertools.count(100)
+
+
+def create_customer(username=None, **fields):
+    """
+    Create a customer user and its Customer profile, returning both.
+    
+    Username, customer number, VAT and phone number come from a sequence unless
+    given, so several customers can coexist without hand-picked unique values.
+    """
+    n = next(_customer_sequence)
+    username = username or f'customer{n}'
+    user = User.objects.create(
+        username=username,
+        email=f'{username}@testsupermarket.be',
+        password=TEST_PASSWORD_HASH,
+        role='customer'
+    )
+    customer_data = {
+        'customer_number': f'CUST{n}',
+        'company_name': 'Test Supermarket',
+        'address': '123 Test Street, Brussels',
+        'vat_number': f'0{n:09d}',
+        'contact_person': 'John Doe',
+        'phone_number': f'02{n:07d}',
+    }
+    customer_data.update(fields)
+    return user, Customer.objects.create(user=user, **customer_data)
+
+
+class CustomerProductTestCase(TestCase):
+    """
+    Base class for tests that need a customer and a product to work with.
+    
+    The fixtures are created once per subclass; tests that modify them should
+    create their own objects instead.
+    """
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Set up the customer and product shared by the subclass's tests."""
+        cls.user, cls.customer = create_customer()
+        
+        cls.product = Product.objects.create(
+            name='Test Product',
+            description='Test Description',
+            **PRODUCT_1_PRICING,
+            minimum_quantity=1
+        )
 
 
 class CustomerModelTest(TestCase):
     """Test cases for the Customer model."""
     
-    def setUp(self):
-        """Set up test data for customer tests."""
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by all customer tests."""
         # Create User first (required for Customer)
-        self.user = User.objects.create_user(
+        cls.user = User.objects.create(
             username='testuser',
             email='john@testsupermarket.be',
-            password='testpass123',
+            password=TEST_PASSWORD_HASH,
             role='customer'
         )
         
-        self.valid_customer_data = {
-            'user': self.user,
+        cls.valid_customer_data = {
+            'user': cls.user,
             'customer_number': 'CUST001',
             'company_name': 'Test Supermarket',
             'address': '123 Test Street, Brussels',
@@ -45,131 +113,73 @@ class CustomerModelTest(TestCase):
     
     def test_vat_number_validation(self):
         """Test VAT number validation."""
-        # Valid VAT numbers
         valid_vats = ['0123456789', '1123456789']
-        for i, vat in enumerate(valid_vats):
-            # Create new user for each test
-            user = User.objects.create_user(
-                username=f'vatuser{i}',
-                email=f'vat{i}@testsupermarket.be',
-                password='testpass123',
-                role='customer'
-            )
-            customer_data = self.valid_customer_data.copy()
-            customer_data['user'] = user
-            customer_data['customer_number'] = f'CUST00{i+12}'  # Make unique
-            customer_data['phone_number'] = f'+32 2 123 45 {70+i}'  # Make unique
-            customer_data['vat_number'] = vat
-            customer = Customer.objects.create(**customer_data)
-            self.assertEqual(customer.vat_number, vat)
-        
-        # Invalid VAT numbers
-        invalid_vats = ['123456789', '012345678', '2123456789', 'abc1234567']
-        for i, vat in enumerate(invalid_vats):
-            # Create new user for each test
-            user = User.objects.create_user(
-                username=f'invalidvatuser{i}',
-                email=f'invalidvat{i}@testsupermarket.be',
-                password='testpass123',
-                role='customer'
-            )
-            customer_data = self.valid_customer_data.copy()
-            customer_data['user'] = user
-            customer_data['customer_number'] = f'CUST00{i+14}'  # Make unique
-            customer_data['phone_number'] = f'+32 2 123 45 {80+i}'  # Make unique
-            customer_data['vat_number'] = vat
-            with self.assertRaises(ValidationError):
-                customer = Customer(**customer_data)
-                customer.full_clean()
+        invalid_vats = ['123456789', '012345678', '2123456789', 'abc1234567', '0123456789\n']
+        # One unsaved instance, checked without uniqueness or user lookups, so no queries
+        customer = Customer(**self.valid_customer_data)
+        for vat in valid_vats + invalid_vats:
+            with self.subTest(vat=vat):
+                customer.vat_number = vat
+                if vat in valid_vats:
+                    customer.full_clean(exclude=['user', 'phone_number', 'delivery_schedule'], validate_unique=False)
+                else:
+                    with self.assertRaises(ValidationError) as cm:
+                        customer.full_clean(exclude=['user', 'phone_number', 'delivery_schedule'], validate_unique=False)
+                    self.assertEqual(list(cm.exception.error_dict), ['vat_number'])
     
     def test_phone_number_validation(self):
         """Test phone number validation."""
-        # Valid phone numbers
-        valid_phones = ['+32 2 123 45 67', '02 123 45 67', '+32 470 12 34 56', '0470 12 34 56']
-        for i, phone in enumerate(valid_phones):
-            # Create new user for each test
-            user = User.objects.create_user(
-                username=f'phoneuser{i}',
-                email=f'phone{i}@testsupermarket.be',
-                password='testpass123',
-                role='customer'
-            )
-            customer_data = self.valid_customer_data.copy()
-            customer_data['user'] = user
-            customer_data['customer_number'] = f'CUST00{i+4}'  # Make unique
-            customer_data['vat_number'] = f'01234567{80+i}'  # Make VAT unique
-            customer_data['phone_number'] = phone
-            customer = Customer.objects.create(**customer_data)
-            self.assertEqual(customer.phone_number, phone)
-        
-        # Invalid phone numbers
-        invalid_phones = ['+32 0123 45 67', '02 0123 45 67', '+33 2 123 45 67', '123 45 67']
-        for i, phone in enumerate(invalid_phones):
-            # Create new user for each test
-            user = User.objects.create_user(
-                username=f'invalidphoneuser{i}',
-                email=f'invalid{i}@testsupermarket.be',
-                password='testpass123',
-                role='customer'
-            )
-            customer_data = self.valid_customer_data.copy()
-            customer_data['user'] = user
-            customer_data['customer_number'] = f'CUST00{i+8}'  # Make unique
-            customer_data['vat_number'] = f'01234567{90+i}'  # Make VAT unique
-            customer_data['phone_number'] = phone
-            with self.assertRaises(ValidationError):
-                customer = Customer(**customer_data)
-                customer.full_clean()
+        # The validator expects digits only, without the spaces used for display
+        valid_phones = ['+3221234567', '021234567', '+32470123456', '0470123456']
+        invalid_phones = ['+32 0123 45 67', '02 0123 45 67', '+33 2 123 45 67', '123 45 67', '021234567\n']
+        # One unsaved instance, checked without uniqueness or user lookups, so no queries
+        customer = Customer(**self.valid_customer_data)
+        for phone in valid_phones + invalid_phones:
+            with self.subTest(phone=phone):
+                customer.phone_number = phone
+                if phone in valid_phones:
+                    customer.full_clean(exclude=['user', 'delivery_schedule'], validate_unique=False)
+                else:
+                    with self.assertRaises(ValidationError) as cm:
+                        customer.full_clean(exclude=['user', 'delivery_schedule'], validate_unique=False)
+                    self.assertEqual(list(cm.exception.error_dict), ['phone_number'])
     
     def test_unique_constraints(self):
         """Test unique constraints for customer_number, user, and phone."""
-        # Create all User objects first to avoid transaction issues
-        user1 = User.objects.create_user(
-            username='duplicateuser1',
-            email='different@email.be',
-            password='testpass123',
-            role='customer'
-        )
-        user2 = User.objects.create_user(
-            username='duplicateuser2',
-            email='another@email.be',
-            password='testpass123',
-            role='customer'
-        )
-        
         # Create first customer successfully
         Customer.objects.create(**self.valid_customer_data)
         
-        # Test duplicate customer_number
-        duplicate_data = self.valid_customer_data.copy()
-        duplicate_data['user'] = user1
-        duplicate_data['phone_number'] = '+32 2 123 45 68'
-        with self.assertRaises(Exception):
-            Customer.objects.create(**duplicate_data)
-        
-        # Test duplicate user (one-to-one relationship)
-        duplicate_data = self.valid_customer_data.copy()
-        duplicate_data['customer_number'] = 'CUST002'
-        duplicate_data['phone_number'] = '+32 2 123 45 68'
-        duplicate_data['vat_number'] = '0123456790'  # Make VAT unique
-        with self.assertRaises(Exception):
-            Customer.objects.create(**duplicate_data)
-        
-        # Test duplicate phone
-        duplicate_data = self.valid_customer_data.copy()
-        duplicate_data['user'] = user2
-        duplicate_data['customer_number'] = 'CUST002'
-        duplicate_data['vat_number'] = '0123456791'  # Make VAT unique
-        with self.assertRaises(Exception):
-            Customer.objects.create(**duplicate_data)
+        # validate_unique() never saves, so the other user doesn't need a row either
+        other_user = User(username='duplicateuser', email='different@email.be', role='customer')
+        unique_data = {
+            **self.valid_customer_data,
+            'user': other_user,
+            'customer_number': 'CUST002',
+            'phone_number': '+32 2 123 45 68',
+            'vat_number': '0123456790',
+        }
+        Customer(**unique_data).validate_unique()
+        
+        duplicates = {
+            'customer_number': {'customer_number': 'CUST001'},
+            'user': {'user': self.user},  # one-to-one relationship
+            'phone_number': {'phone_number': '+32 2 123 45 67'},
+        }
+        for field, values in duplicates.items():
+            with self.subTest(field=field):
+                with self.assertRaises(ValidationError) as cm:
+                    Customer(**{**unique_data, **values}).validate_unique()
+                self.assertEqual(list(cm.exception.error_dict), [field])
     
     def test_delivery_schedule_functionality(self):
         """Test delivery schedule functionality with new JSON field structure."""
         # Create customer with delivery schedule using new format
-        customer_data = self.valid_customer_data.copy()
-        customer_data['delivery_schedule'] = {
-            '1': ['0', '08:00'],  # Tuesday delivery, order by Monday 8 AM
-            '4': ['3', '08:00']   # Friday delivery, order by Thursday 8 AM
+        customer_data = {
+            **self.valid_customer_data,
+            'delivery_schedule': {
+                '1': ['0', '08:00'],  # Tuesday delivery, order by Monday 8 AM
+                '4': ['3', '08:00']   # Friday delivery, order by Thursday 8 AM
+            },
         }
         
         customer = Customer.objects.create(**customer_data)
@@ -183,30 +193,104 @@ class CustomerModelTest(TestCase):
         # For now, just test that the method exists and doesn't crash
         self.assertTrue(hasattr(customer, 'can_order_for_delivery'))
     
-    def test_delivery_schedule_basic_functionality(self):
-        """Test basic delivery schedule functionality with new structure."""
-        # Create new user for this test to avoid conflicts
-        user = User.objects.create_user(
-            username='basicuser',
-            email='basic@testsupermarket.be',
-            password='testpass123',
-            role='customer'
-        )
+    def test_can_order_for_delivery(self):
+        """Test ordering deadlines against a fixed clock."""
+        customer_data = {
+            **self.valid_customer_data,
+            'delivery_schedule': {
+                '1': ['0', '08:00'],  # Tuesday delivery, order by Monday 8 AM
+                '4': ['3', '8:00']    # Friday delivery, order by Thursday 8 AM
+            },
+        }
+        customer = Customer.objects.create(**customer_data)
         
-        customer_data = self.valid_customer_data.copy()
-        customer_data['user'] = user
-        customer_data['customer_number'] = 'CUST003'  # Make unique
-        customer_data['phone_number'] = '+32 2 123 45 69'  # Make unique
-        customer_data['vat_number'] = '0123456792'  # Make VAT unique
-        customer_data['delivery_schedule'] = {
-            '1': ['0', '08:00'],  # Tuesday delivery, order by Monday 8 AM
-            '4': ['3', '14:30']   # Friday delivery, order by Thursday 2:30 PM
+        class MondayMorning(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return cls(2024, 1, 1, 7, 30)  # Monday 7:30 AM
+        
+        class MondayAfternoon(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return cls(2024, 1, 1, 14, 0)  # Monday 2 PM
+        
+        with mock.patch('orders.models.datetime', MondayMorning):
+            self.assertTrue(customer.can_order_for_delivery(1))
+            self.assertTrue(customer.can_order_for_delivery('4'))
+            self.assertFalse(customer.can_order_for_delivery(2))
+        
+        with mock.patch('orders.models.datetime', MondayAfternoon):
+            self.assertFalse(customer.can_order_for_delivery(1))
+            self.assertTrue(customer.can_order_for_delivery(4))
+    
+    def test_get_next_delivery_day_info(self):
+        """Test picking the next delivery day, wrapping around to next week."""
+        customer_data = {
+            **self.valid_customer_data,
+            'delivery_schedule': {
+                '1': ['0', '08:00'],  # Tuesday delivery, order by Monday 8 AM
+                '4': ['3', '08:00']   # Friday delivery, order by Thursday 8 AM
+            },
         }
+        customer = Customer.objects.create(**customer_data)
         
+        expected = {
+            date(2024, 1, 1): (1, 'Tuesday', date(2024, 1, 2)),   # Monday
+            date(2024, 1, 2): (4, 'Friday', date(2024, 1, 5)),    # Tuesday
+            date(2024, 1, 5): (1, 'Tuesday', date(2024, 1, 9)),   # Friday
+            date(2024, 1, 7): (1, 'Tuesday', date(2024, 1, 9)),   # Sunday
+        }
+        for today, (day_index, day_name, next_date) in expected.items():
+            class FixedDatetime(datetime):
+                @classmethod
+                def now(cls, tz=None):
+                    return cls(today.year, today.month, today.day, 9, 0)
+            
+            with mock.patch('orders.models.datetime', FixedDatetime):
+                info = customer.get_next_delivery_day_info()
+            self.assertEqual((info[0], info[1], info[2].date()), (day_index, day_name, next_date))
+    
+    def test_for_delivery_day(self):
+        """Test filtering customers by delivery day."""
+        customer_data = {
+            **self.valid_customer_data,
+            'delivery_schedule': {
+                '1': ['0', '08:00'],  # Tuesday delivery, order by Monday 8 AM
+                '4': ['3', '08:00']   # Friday delivery, order by Thursday 8 AM
+            },
+        }
         customer = Customer.objects.create(**customer_data)
         
-        # Test that the delivery schedule is stored correctly
-        self.assertEqual(customer.delivery_schedule, {
+        self.assertEqual(list(Customer.for_delivery_day(1)), [customer])
+        self.assertEqual(list(Customer.for_delivery_day('4')), [customer])
+        self.assertEqual(list(Customer.for_delivery_day(2)), [])
+    
+    def test_next_delivery_info_cached_until_save(self):
+        """Test that the next delivery info is computed once and recomputed after saving."""
+        _, customer = create_customer(delivery_schedule={'1': ['0', '08:00']})
+        
+        self.assertIs(customer.next_delivery_info, customer.next_delivery_info)
+        self.assertEqual(customer.next_delivery_info[1], 'Tuesday')
+        
+        customer.delivery_schedule = {'4': ['3', '08:00']}
+        customer.save()
+        self.assertEqual(customer.next_delivery_info[1], 'Friday')
+    
+    def test_create_customer_helper_is_valid(self):
+        """Test that customers from the shared create_customer() helper pass model validation."""
+        _, customer = create_customer(delivery_schedule={'1': ['0', '08:00']})
+        customer.full_clean()
+    
+    def test_delivery_schedule_basic_functionality(self):
+        """Test basic delivery schedule functionality with new structure."""
+        _, customer = create_customer(delivery_schedule={
+            '1': ['0', '08:00'],  # Tuesday delivery, order by Monday 8 AM
+            '4': ['3', '14:30']   # Friday delivery, order by Thursday 2:30 PM
+        })
+        
+        # create() hands back the dict it was given; don't reload the customer
+        # just to compare it
+        self.assertDictEqual(customer.delivery_schedule, {
             '1': ['0', '08:00'],
             '4': ['3', '14:30']
         })
@@ -223,44 +307,15 @@ class CustomerModelTest(TestCase):
             '6': ['5', '16:00']   # Sunday delivery, order by Saturday 4 PM
         }
         
-        # Create new user for this test
-        user = User.objects.create_user(
-            username='scheduleuser',
-            email='schedule@testsupermarket.be',
-            password='testpass123',
-            role='customer'
-        )
-        
-        customer_data = self.valid_customer_data.copy()
-        customer_data['user'] = user
-        customer_data['customer_number'] = 'CUST002'  # Make unique
-        customer_data['phone_number'] = '+32 2 123 45 68'  # Make unique
-        customer_data['vat_number'] = '0123456790'  # Make VAT unique
-        customer_data['delivery_schedule'] = valid_schedule
-        
-        customer = Customer.objects.create(**customer_data)
-        self.assertEqual(customer.delivery_schedule, valid_schedule)
+        _, customer = create_customer(delivery_schedule=valid_schedule)
+        self.assertDictEqual(customer.delivery_schedule, valid_schedule)
     
     def test_empty_delivery_schedule(self):
         """Test customer with no delivery schedule."""
-        # Create new user for this test to avoid conflicts
-        user = User.objects.create_user(
-            username='emptyuser',
-            email='empty@testsupermarket.be',
-            password='testpass123',
-            role='customer'
-        )
-        
-        customer_data = self.valid_customer_data.copy()
-        customer_data['user'] = user
-        customer_data['customer_number'] = 'CUST004'  # Make unique
-        customer_data['phone_number'] = '+32 2 123 45 70'  # Make unique
-        customer_data['vat_number'] = '0123456793'  # Make VAT unique
-        
-        customer = Customer.objects.create(**customer_data)
+        _, customer = create_customer()
         
         # Should handle empty delivery schedule gracefully
-        self.assertEqual(customer.delivery_schedule, {})
+        self.assertDictEqual(customer.delivery_schedule, {})
         
         # get_next_delivery_day_info should return None values
         day_index, day_name, next_date = customer.get_next_delivery_day_info()
@@ -274,17 +329,20 @@ class CustomerModelTest(TestCase):
     def test_get_existing_order_for_delivery_date(self):
         """Test getting existing order for a specific delivery date."""
         # Create customer with delivery schedule
-        customer_data = self.valid_customer_data.copy()
-        customer_data['delivery_schedule'] = {
-            '1': ['0', '08:00'],  # Tuesday delivery, order by Monday 8 AM
-            '4': ['3', '08:00']   # Friday delivery, order by Thursday 8 AM
+        customer_data = {
+            **self.valid_customer_data,
+            'delivery_schedule': {
+                '1': ['0', '08:00'],  # Tuesday delivery, order by Monday 8 AM
+                '4': ['3', '08:00']   # Friday delivery, order by Thursday 8 AM
+            },
         }
         
         customer = Customer.objects.create(**customer_data)
         
         # Test with no existing order
         delivery_date = date(2024, 1, 2)  # Tuesday
-        existing_order = customer.get_existing_order_for_delivery_date(delivery_date)
+        with self.assertNumQueries(1):
+            existing_order = customer.get_existing_order_for_delivery_date(delivery_date)
         self.assertIsNone(existing_order)
         
         # Create an order for this delivery date
@@ -295,86 +353,75 @@ class CustomerModelTest(TestCase):
         )
         
         # Test with existing order
-        existing_order = customer.get_existing_order_for_delivery_date(delivery_date)
+        with self.assertNumQueries(1):
+            existing_order = customer.get_existing_order_for_delivery_date(delivery_date)
         self.assertEqual(existing_order, order)
         
         # Test with different delivery date
         different_date = date(2024, 1, 5)  # Friday
-        existing_order = customer.get_existing_order_for_delivery_date(different_date)
+        with self.assertNumQueries(1):
+            existing_order = customer.get_existing_order_for_delivery_date(different_date)
         self.assertIsNone(existing_order)
 
 
-class ProductModelTest(TestCase):
-    """Test cases for the Product model."""
+class ProductCalculationTest(SimpleTestCase):
+    """Test cases for Product calculations that don't need the database."""
     
-    def setUp(self):
-        """Set up test data for product tests."""
-        self.valid_product_data = {
-            'name': 'Premium Serrano Ham',
-            'description': 'High-quality Spanish Serrano ham',
-            'price_per_kg': Decimal('18.00'),
-            'margin_rate': Decimal('0.30'),
-            'approximate_weight': Decimal('0.150'),
-            'minimum_quantity': 10,
-            'is_active': True
-        }
+    valid_product_data = {
+        'name': 'Premium Serrano Ham',
+        'description': 'High-quality Spanish Serrano ham',
+        'price_per_kg': Decimal('18.00'),
+        'margin_rate': Decimal('0.30'),
+        'approximate_weight': Decimal('0.150'),
+        'minimum_quantity': 10,
+        'is_active': True
+    }
     
-    def test_create_product(self):
-        """Test creating a product with valid data."""
-        product = Product.objects.create(**self.valid_product_data)
-        self.assertEqual(product.name, 'Premium Serrano Ham')
-        self.assertEqual(product.price_per_kg, Decimal('18.00'))
-        self.assertEqual(product.margin_rate, Decimal('0.30'))
-        self.assertEqual(product.approximate_weight, Decimal('0.150'))
+    # Expected prices for valid_product_data
+    EXPECTED_WHOLESALE = Decimal('2.70')          # 18.00 × 0.150
+    EXPECTED_RETAIL = Decimal('3.72')             # 2.70 × 1.06 × 1.30
+    EXPECTED_RETAIL_PER_KG = Decimal('24.80')     # 18.00 × 1.06 × 1.30
+    RETAIL_OVERRIDE = Decimal('4.50')
+    EXPECTED_OVERRIDE_PER_KG = Decimal('30.00')   # 4.50 ÷ 0.150
     
     def test_product_str_representation(self):
         """Test product string representation."""
-        product = Product.objects.create(**self.valid_product_data)
+        product = Product(**self.valid_product_data)
         expected = 'Premium Serrano Ham - 0.150kg'
         self.assertEqual(str(product), expected)
     
     def test_wholesale_price_calculation(self):
         """Test wholesale price calculation."""
-        product = Product.objects.create(**self.valid_product_data)
-        # 18.00 × 0.150 = 2.70
-        expected_wholesale = Decimal('2.70')
-        self.assertEqual(product.wholesale_price, expected_wholesale)
+        product = Product(**self.valid_product_data)
+        self.assertEqual(product.wholesale_price, self.EXPECTED_WHOLESALE)
     
     def test_retail_price_calculation(self):
         """Test retail price calculation with margin and VAT."""
-        product = Product.objects.create(**self.valid_product_data)
-        # (2.70 × 1.06 × 1.30) = 3.72
-        expected_retail = Decimal('3.72')
-        self.assertEqual(product.retail_price, expected_retail)
+        product = Product(**self.valid_product_data)
+        self.assertEqual(product.retail_price, self.EXPECTED_RETAIL)
     
     def test_retail_price_override(self):
         """Test retail price override functionality."""
-        product = Product.objects.create(**self.valid_product_data)
-        product.retail_price_override = Decimal('4.50')
-        product.save()
+        product = Product(**self.valid_product_data)
+        product.retail_price_override = self.RETAIL_OVERRIDE
         
-        self.assertEqual(product.retail_price, Decimal('4.50'))
-    
-    def test_price_per_kg_retail_calculation(self):
-        """Test retail price per kilogram calculation."""
-        product = Product.objects.create(**self.valid_product_data)
-        # (18.00 × 1.06 × 1.30) = 24.80
-        expected_retail_per_kg = Decimal('24.80')
-        self.assertEqual(product.price_per_kg_retail, expected_retail_per_kg)
+        self.assertEqual(product.retail_price, self.RETAIL_OVERRIDE)
     
     def test_price_per_kg_retail_with_override(self):
         """Test retail price per kg when override is set."""
-        product = Product.objects.create(**self.valid_product_data)
-        product.retail_price_override = Decimal('4.50')
-        product.save()
+        product = Product(**self.valid_product_data)
+        product.retail_price_override = self.RETAIL_OVERRIDE
         
-        # 4.50 ÷ 0.150 = 30.00
-        expected_retail_per_kg = Decimal('30.00')
-        self.assertEqual(product.price_per_kg_retail, expected_retail_per_kg)
+        self.assertEqual(product.price_per_kg_retail, self.EXPECTED_OVERRIDE_PER_KG)
+    
+    def test_price_per_kg_retail_calculation(self):
+        """Test retail price per kilogram calculation."""
+        product = Product(**self.valid_product_data)
+        self.assertEqual(product.price_per_kg_retail, self.EXPECTED_RETAIL_PER_KG)
     
     def test_margin_rate_default(self):
         """Test that margin rate defaults to 30%."""
-        product = Product.objects.create(**self.valid_product_data)
+        product = Product(**self.valid_product_data)
         self.assertEqual(product.margin_rate, Decimal('0.3'))  # Use actual value, not string
     
     def test_is_active_default(self):
@@ -382,109 +429,110 @@ class ProductModelTest(TestCase):
         product_data = self.valid_product_data.copy()
         del product_data['is_active']
         
-        product = Product.objects.create(**product_data)
+        product = Product(**product_data)
         self.assertTrue(product.is_active)
 
-    def test_quantities_for_orders(self):
-        """Test quantities_for_orders method."""
-        # Create User and Customer first
-        user = User.objects.create_user(
-            username='quantitiesuser',
-            email='quantities@testsupermarket.be',
-            password='testpass123',
-            role='customer'
-        )
+
+class ProductModelTest(TestCase):
+    """Test cases for the Product model."""
+    
+    valid_product_data = ProductCalculationTest.valid_product_data
+    
+    def test_create_product(self):
+        """Test creating a product with valid data."""
+        product = Product.objects.create(**self.valid_product_data)
+        self.assertEqual(product.name, 'Premium Serrano Ham')
+        self.assertEqual(product.price_per_kg, Decimal('18.00'))
+        self.assertEqual(product.margin_rate, Decimal('0.30'))
+        self.assertEqual(product.approximate_weight, Decimal('0.150'))
+    
+    def test_cached_prices_refresh_after_save(self):
+        """Test that cached prices are recalculated once the product is saved."""
+        product = Product.objects.create(**self.valid_product_data)
+        self.assertEqual(product.retail_price, Decimal('3.72'))
         
-        customer = Customer.objects.create(
-            user=user,
-            customer_number='CUST005',
-            company_name='Test Supermarket',
-            address='123 Test Street, Brussels',
-            vat_number='0123456794',
-            contact_person='John Doe',
-            phone_number='+32 2 123 45 71'
-        )
+        product.retail_price_override = Decimal('4.50')
+        product.save()
+        self.assertEqual(product.retail_price, Decimal('4.50'))
         
-        # Create the product
+        Product.objects.filter(pk=product.pk).update(price_per_kg=Decimal('20.00'))
+        self.assertEqual(product.wholesale_price, Decimal('2.70'))
+        product.refresh_from_db()
+        self.assertEqual(product.wholesale_price, Decimal('3.00'))
+    
+    def test_with_prices_matches_python_calculation(self):
+        """Test that database-computed prices match the Python properties."""
         product = Product.objects.create(**self.valid_product_data)
-        
-        # Create some orders
-        order1 = Order.objects.create(
-            customer=customer,
-            delivery_date='2024-01-02',
-            status='pending'
+        override_product = Product.objects.create(
+            **{**self.valid_product_data, 'retail_price_override': Decimal('4.50')}
         )
-        
-        order2 = Order.objects.create(
-            customer=customer,
-            delivery_date='2024-01-05',
-            status='confirmed'
+        # 10.10 x 0.250 = 2.525: rounds half up to 2.53, not half to even
+        tie_product = Product.objects.create(
+            **{**self.valid_product_data, 'price_per_kg': Decimal('10.10'), 'approximate_weight': Decimal('0.250')}
         )
+        self.assertEqual(tie_product.wholesale_price, Decimal('2.53'))
         
-        order3 = Order.objects.create(
-            customer=customer,
-            delivery_date='2024-01-09',
-            status='pending'
-        )
+        annotated = Product.objects.with_prices().in_bulk([product.pk, override_product.pk, tie_product.pk])
+        for instance in (product, override_product, tie_product):
+            self.assertEqual(annotated[instance.pk].annotated_wholesale_price, instance.wholesale_price)
+            self.assertEqual(annotated[instance.pk].annotated_retail_price, instance.retail_price)
+    
+    def test_quantities_for_orders(self):
+        """Test quantities_for_orders method."""
+        _, customer = create_customer()
         
-        # Create order items with different quantities
-        OrderItem.objects.create(
-            order=order1,
-            product=product,
-            quantity=5
-        )
+        # Create the product
+        product = Product.objects.create(**self.valid_product_data)
         
-        OrderItem.objects.create(
-            order=order2,
-            product=product,
-            quantity=10
-        )
+        # Create some orders
+        order1, order2, order3 = Order.objects.bulk_create([
+            Order(customer=customer, delivery_date=date(2024, 1, 2), status='pending'),
+            Order(customer=customer, delivery_date=date(2024, 1, 5), status='confirmed'),
+            Order(customer=customer, delivery_date=date(2024, 1, 9), status='pending'),
+        ])
+        
+        # Create order items with different quantities. bulk_create() skips
+        # OrderItem.save(), so prices are set explicitly (2.70 wholesale each).
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order1, product=product, quantity=5,
+                      unit_price=Decimal('2.70'), total_price=Decimal('13.50')),
+            OrderItem(order=order2, product=product, quantity=10,
+                      unit_price=Decimal('2.70'), total_price=Decimal('27.00')),
+        ])
         
         # Note: order3 has no items for this product
         
         # Test quantities_for_orders method
         order_ids = [order1.id, order2.id, order3.id]
-        quantities = product.quantities_for_orders(order_ids)
+        with self.assertNumQueries(1):
+            quantities = product.quantities_for_orders(order_ids)
         
         # Should return quantities in the same order as order_ids
         self.assertEqual(quantities, [5, 10, 0])
         
         # Test with different order of order_ids
         order_ids_reversed = [order3.id, order2.id, order1.id]
-        quantities_reversed = product.quantities_for_orders(order_ids_reversed)
+        with self.assertNumQueries(1):
+            quantities_reversed = product.quantities_for_orders(order_ids_reversed)
         self.assertEqual(quantities_reversed, [0, 10, 5])
         
         # Test with non-existent order IDs
         non_existent_ids = [999, 998, 997]
-        quantities_non_existent = product.quantities_for_orders(non_existent_ids)
+        with self.assertNumQueries(1):
+            quantities_non_existent = product.quantities_for_orders(non_existent_ids)
         self.assertEqual(quantities_non_existent, [0, 0, 0])
 
 
-class OrderModelTest(TestCase):
+class OrderModelTest(CustomerProductTestCase):
     """Test cases for the Order model."""
     
-    def setUp(self):
-        """Set up test data for order tests."""
-        # Create User first
-        self.user = User.objects.create_user(
-            username='orderuser',
-            email='john@testsupermarket.be',
-            password='testpass123',
-            role='customer'
-        )
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by all order tests."""
+        super().setUpTestData()
         
-        self.customer = Customer.objects.create(
-            user=self.user,
-            customer_number='CUST001',
-            company_name='Test Supermarket',
-            address='123 Test Street, Brussels',
-            vat_number='0123456789',
-            contact_person='John Doe',
-            phone_number='+32 2 123 45 67'
-        )
-        
-        self.valid_order_data = {
-            'customer': self.customer,
+        cls.valid_order_data = {
+            'customer': cls.customer,
             'delivery_date': date(2024, 1, 15),
             'status': 'pending',
             'notes': 'Delivery before 2 PM'
@@ -508,9 +556,7 @@ class OrderModelTest(TestCase):
         """Test order status choices."""
         valid_statuses = ['pending', 'confirmed', 'cancelled']
         for status in valid_statuses:
-            order_data = self.valid_order_data.copy()
-            order_data['status'] = status
-            order = Order.objects.create(**order_data)
+            order = Order.objects.create(**{**self.valid_order_data, 'status': status})
             self.assertEqual(order.status, status)
     
     def test_order_default_status(self):
@@ -526,39 +572,45 @@ class OrderModelTest(TestCase):
         order = Order.objects.create(**self.valid_order_data)
         
         # Create some order items with different products
-        product1 = Product.objects.create(
+        product1, product2 = Product.objects.bulk_create([
+            Product(name='Test Product 1', description='Test Description 1',
+                    **PRODUCT_1_PRICING, minimum_quantity=1),
+            Product(name='Test Product 2', description='Test Description 2',
+                    **PRODUCT_2_PRICING, minimum_quantity=1),
+        ])
+        
+        # bulk_create() skips OrderItem.save(), so prices are set explicitly
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product1, quantity=5,
+                      unit_price=Decimal('3.00'), total_price=Decimal('15.00')),
+            OrderItem(order=order, product=product2, quantity=3,
+                      unit_price=Decimal('3.00'), total_price=Decimal('9.00')),
+        ])
+        
+        with self.assertNumQueries(1):
+            self.assertEqual(order.total_items, 8)
+    
+    def test_totals_use_annotations(self):
+        """Test that with_totals() annotations are reused instead of re-querying."""
+        order = Order.objects.create(**self.valid_order_data)
+        product = Product.objects.create(
             name='Test Product 1',
             description='Test Description 1',
-            price_per_kg=Decimal('10.00'),
-            approximate_weight=Decimal('0.100'),
+            **PRODUCT_1_PRICING,
             minimum_quantity=1
         )
-        
-        product2 = Product.objects.create(
-            name='Test Product 2',
-            description='Test Description 2',
-            price_per_kg=Decimal('20.00'),
-            approximate_weight=Decimal('0.200'),
-            minimum_quantity=1
-        )
-        
-        OrderItem.objects.create(
-            order=order,
-            product=product1,
-            quantity=5,
-            unit_price=Decimal('3.00'),
-            total_price=Decimal('15.00')
-        )
-        
-        OrderItem.objects.create(
-            order=order,
-            product=product2,
-            quantity=3,
-            unit_price=Decimal('3.00'),
-            total_price=Decimal('9.00')
-        )
-        
-        self.assertEqual(order.total_items, 8)
+        OrderItem.objects.create(order=order, product=product, quantity=5)
+        
+        annotated = Order.objects.with_totals().get(pk=order.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(annotated.total_items, 5)
+            self.assertEqual(annotated.total_amount, Decimal('5.00'))
+        
+        empty = Order.objects.create(**self.valid_order_data)
+        annotated = Order.objects.with_totals().get(pk=empty.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(annotated.total_items, 0)
+            self.assertEqual(annotated.total_amount, Decimal('0.00'))
     
     def test_automatic_total_amount_calculation(self):
         """Test automatic total amount calculation from order items."""
@@ -569,16 +621,14 @@ class OrderModelTest(TestCase):
         product1 = Product.objects.create(
             name='Test Product 1',
             description='Test Description 1',
-            price_per_kg=Decimal('10.00'),
-            approximate_weight=Decimal('0.100'),
+            **PRODUCT_1_PRICING,
             minimum_quantity=1
         )
         
         product2 = Product.objects.create(
             name='Test Product 2',
             description='Test Description 2',
-            price_per_kg=Decimal('20.00'),
-            approximate_weight=Decimal('0.200'),
+            **PRODUCT_2_PRICING,
             minimum_quantity=1
         )
         
@@ -603,50 +653,28 @@ class OrderModelTest(TestCase):
         order_item2.save()
         
         # total_amount should be calculated automatically via property
-        expected_total = sum(item.total_price for item in order.order_items.all())
-        self.assertEqual(order.total_amount, expected_total)
+        expected_total = order.order_items.aggregate(total=Sum('total_price'))['total'] or Decimal('0.00')
+        with self.assertNumQueries(1):
+            self.assertEqual(order.total_amount, expected_total)
 
 
-class OrderItemModelTest(TestCase):
+class OrderItemModelTest(CustomerProductTestCase):
     """Test cases for the OrderItem model."""
     
-    def setUp(self):
-        """Set up test data for order item tests."""
-        # Create User first
-        self.user = User.objects.create_user(
-            username='orderitemuser',
-            email='john@testsupermarket.be',
-            password='testpass123',
-            role='customer'
-        )
-        
-        self.customer = Customer.objects.create(
-            user=self.user,
-            customer_number='CUST001',
-            company_name='Test Supermarket',
-            address='123 Test Street, Brussels',
-            vat_number='0123456789',
-            contact_person='John Doe',
-            phone_number='+32 2 123 45 67'
-        )
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by all order item tests."""
+        super().setUpTestData()
         
-        self.order = Order.objects.create(
-            customer=self.customer,
+        cls.order = Order.objects.create(
+            customer=cls.customer,
             delivery_date=date(2024, 1, 15),
             status='pending'
         )
         
-        self.product = Product.objects.create(
-            name='Test Product',
-            description='Test Description',
-            price_per_kg=Decimal('10.00'),
-            approximate_weight=Decimal('0.100'),
-            minimum_quantity=1
-        )
-        
-        self.valid_order_item_data = {
-            'order': self.order,
-            'product': self.product,
+        cls.valid_order_item_data = {
+            'order': cls.order,
+            'product': cls.product,
             'quantity': 5
             # unit_price and total_price will be calculated automatically
         }
@@ -678,80 +706,115 @@ class OrderItemModelTest(TestCase):
         expected_total = order_item.quantity * order_item.unit_price
         self.assertEqual(order_item.total_price, expected_total)
     
+    def test_bulk_create_items(self):
+        """Test that bulk-created items get the same prices as saved items."""
+        product2 = Product.objects.create(
+            name='Test Product 2',
+            description='Test Description 2',
+            **PRODUCT_2_PRICING,
+            minimum_quantity=1
+        )
+        
+        with self.assertNumQueries(2):
+            OrderItem.bulk_create_items(self.order, [(self.product.id, 5), (product2.id, 3)])
+        
+        items = {item.product_id: item for item in self.order.order_items.all()}
+        self.assertEqual(items[self.product.id].unit_price, Decimal('1.00'))
+        self.assertEqual(items[self.product.id].total_price, Decimal('5.00'))
+        self.assertEqual(items[product2.id].unit_price, Decimal('4.00'))
+        self.assertEqual(items[product2.id].total_price, Decimal('12.00'))
+    
     def test_unique_together_constraint(self):
         """Test that order and product combination must be unique."""
         OrderItem.objects.create(**self.valid_order_item_data)
         
         # Try to create another order item with same order and product
-        duplicate_data = self.valid_order_item_data.copy()
-        duplicate_data['quantity'] = 10
-        duplicate_data['unit_price'] = Decimal('4.00')
-        duplicate_data['total_price'] = Decimal('40.00')
+        duplicate_data = {
+            **self.valid_order_item_data,
+            'quantity': 10,
+            'unit_price': Decimal('4.00'),
+            'total_price': Decimal('40.00'),
+        }
         
-        with self.assertRaises(Exception):
+        # Keep the failed INSERT inside its own savepoint so the test transaction stays usable
+        with self.assertRaises(IntegrityError), transaction.atomic():
             OrderItem.objects.create(**duplicate_data)
+        self.assertEqual(OrderItem.objects.filter(order=self.order).count(), 1)
+    
+    def test_total_price_with_non_decimal_unit_price(self):
+        """Test that an int or float unit price still gives the right total."""
+        for i, (unit_price, expected_total) in enumerate([(5, Decimal('10.00')), (2.5, Decimal('5.00'))]):
+            with self.subTest(unit_price=unit_price):
+                order = Order.objects.create(customer=self.customer, delivery_date=date(2024, 2, 1 + i))
+                order_item = OrderItem.objects.create(
+                    order=order, product=self.product, quantity=2, unit_price=unit_price
+                )
+                self.assertEqual(order_item.total_price, expected_total)
     
     def test_quantity_validation(self):
         """Test quantity field validation."""
         # Test positive quantity
-        order_item_data = self.valid_order_item_data.copy()
-        order_item_data['quantity'] = 1
         # Create a new order to avoid unique constraint violation
         new_order = Order.objects.create(
             customer=self.customer,
             delivery_date=date(2024, 1, 16)
         )
-        order_item_data['order'] = new_order
-        order_item = OrderItem.objects.create(**order_item_data)
+        order_item = OrderItem.objects.create(
+            **{**self.valid_order_item_data, 'order': new_order, 'quantity': 1}
+        )
         self.assertEqual(order_item.quantity, 1)
         # unit_price and total_price should be calculated automatically
         self.assertEqual(order_item.unit_price, self.product.wholesale_price)
         self.assertEqual(order_item.total_price, self.product.wholesale_price)
         
         # Test zero quantity (should be allowed by model, but might be validated in forms)
-        order_item_data['quantity'] = 0
         # Create another new order
         another_order = Order.objects.create(
             customer=self.customer,
             delivery_date=date(2024, 1, 17)
         )
-        order_item_data['order'] = another_order
-        order_item = OrderItem.objects.create(**order_item_data)
+        order_item = OrderItem.objects.create(
+            **{**self.valid_order_item_data, 'order': another_order, 'quantity': 0}
+        )
         self.assertEqual(order_item.quantity, 0)
         # total_price should be 0 when quantity is 0
         self.assertEqual(order_item.total_price, Decimal('0.00'))
-
-
-class ModelRelationshipsTest(TestCase):
-    """Test cases for model relationships."""
     
-    def setUp(self):
-        """Set up test data for relationship tests."""
-        # Create User first
-        self.user = User.objects.create_user(
-            username='relationshipuser',
-            email='john@testsupermarket.be',
-            password='testpass123',
-            role='customer'
+    def test_replace_items(self):
+        """Test that replacing items only writes the rows that change."""
+        kept_product, changed_product, removed_product = Product.objects.bulk_create([
+            Product(name=f'Replace Product {i}', **PRODUCT_2_PRICING, minimum_quantity=1) for i in range(3)
+        ])
+        kept, changed, _ = OrderItem.bulk_create_items(
+            self.order, [(kept_product.id, 2), (changed_product.id, 3), (removed_product.id, 4)]
         )
         
-        self.customer = Customer.objects.create(
-            user=self.user,
-            customer_number='CUST001',
-            company_name='Test Supermarket',
-            address='123 Test Street, Brussels',
-            vat_number='0123456789',
-            contact_person='John Doe',
-            phone_number='+32 2 123 45 67'
-        )
+        # Load items, load products, then one DELETE, one UPDATE and one INSERT
+        with self.assertNumQueries(5):
+            OrderItem.replace_items(
+                self.order, [(kept_product.id, 2), (changed_product.id, 6), (self.product.id, 5)]
+            )
         
-        self.product = Product.objects.create(
-            name='Test Product',
-            description='Test Description',
-            price_per_kg=Decimal('10.00'),
-            approximate_weight=Decimal('0.100'),
-            minimum_quantity=1
+        items = {item.product_id: item for item in self.order.order_items.all()}
+        self.assertEqual(
+            {product_id: item.quantity for product_id, item in items.items()},
+            {kept_product.id: 2, changed_product.id: 6, self.product.id: 5},
         )
+        self.assertEqual(items[kept_product.id].pk, kept.pk)
+        self.assertEqual(items[changed_product.id].pk, changed.pk)
+        self.assertEqual(items[changed_product.id].total_price, Decimal('24.00'))
+        self.assertEqual(items[self.product.id].total_price, Decimal('5.00'))
+    
+    def test_replace_items_unchanged(self):
+        """Test that replacing items with the same quantities writes nothing."""
+        OrderItem.bulk_create_items(self.order, [(self.product.id, 5)])
+        
+        with self.assertNumQueries(2):
+            OrderItem.replace_items(self.order, [(self.product.id, 5)])
+
+
+class ModelRelationshipsTest(CustomerProductTestCase):
+    """Test cases for model relationships."""
     
     def test_customer_orders_relationship(self):
         """Test customer to orders relationship."""
@@ -767,9 +830,15 @@ class ModelRelationshipsTest(TestCase):
             status='confirmed'
         )
         
-        self.assertEqual(self.customer.orders.count(), 2)
-        self.assertIn(self.order1, self.customer.orders.all())
-        self.assertIn(self.order2, self.customer.orders.all())
+        orders = list(self.customer.orders.select_related('customer'))
+        self.assertEqual(len(orders), 2)
+        self.assertIn(self.order1, orders)
+        self.assertIn(self.order2, orders)
+        
+        # Test that orders can access their customer without extra queries
+        with self.assertNumQueries(0):
+            for order in orders:
+                self.assertEqual(order.customer, self.customer)
     
     def test_order_items_relationship(self):
         """Test order to order items relationship."""
@@ -783,32 +852,26 @@ class ModelRelationshipsTest(TestCase):
         product2 = Product.objects.create(
             name='Test Product 2',
             description='Test Description 2',
-            price_per_kg=Decimal('20.00'),
-            approximate_weight=Decimal('0.200'),
+            **PRODUCT_2_PRICING,
             minimum_quantity=1
         )
         
-        order_item1 = OrderItem.objects.create(
-            order=order,
-            product=self.product,
-            quantity=2
-            # unit_price and total_price will be calculated automatically
-        )
+        # Prices aren't under test here, so skip save() and insert both items at once
+        order_item1, order_item2 = OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=self.product, quantity=2),
+            OrderItem(order=order, product=product2, quantity=3),  # Use different product
+        ])
         
-        order_item2 = OrderItem.objects.create(
-            order=order,
-            product=product2,  # Use different product
-            quantity=3
-            # unit_price and total_price will be calculated automatically
-        )
-        
-        self.assertEqual(order.order_items.count(), 2)
-        self.assertIn(order_item1, order.order_items.all())
-        self.assertIn(order_item2, order.order_items.all())
-        
-        # Test that order items can access their order
-        self.assertEqual(order_item1.order, order)
-        self.assertEqual(order_item2.order, order)
+        order_items = list(order.order_items.select_related('order', 'product'))
+        self.assertEqual(len(order_items), 2)
+        self.assertIn(order_item1, order_items)
+        self.assertIn(order_item2, order_items)
+        
+        # Test that order items can access their order and product without extra queries
+        with self.assertNumQueries(0):
+            for order_item in order_items:
+                self.assertEqual(order_item.order, order)
+            self.assertEqual({item.product.name for item in order_items}, {'Test Product', 'Test Product 2'})
     
     def test_product_order_items_relationship(self):
         """Test product to order items relationship."""
@@ -858,24 +921,11 @@ class ModelRelationshipsTest(TestCase):
 class ViewTest(TestCase):
     """Test cases for views."""
     
-    def setUp(self):
-        """Set up test data for view tests."""
-        # Create User and Customer
-        self.user = User.objects.create_user(
-            username='viewuser',
-            email='view@testsupermarket.be',
-            password='testpass123',
-            role='customer'
-        )
-        
-        self.customer = Customer.objects.create(
-            user=self.user,
-            customer_number='CUST006',
-            company_name='Test Supermarket',
-            address='123 Test Street, Brussels',
-            vat_number='0123456795',
-            contact_person='John Doe',
-            phone_number='+32 2 123 45 72',
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data shared by all view tests."""
+        cls.user, cls.customer = create_customer(
+            'viewuser',
             delivery_schedule={
                 '0': ['6', '08:00'],  # Monday delivery, order by Sunday 8 AM
                 '1': ['0', '08:00'],  # Tuesday delivery, order by Monday 8 AM
@@ -888,31 +938,31 @@ class ViewTest(TestCase):
         )
         
         # Create some products
-        self.product1 = Product.objects.create(
+        cls.product1 = Product.objects.create(
             name='Test Product 1',
             description='Test Description 1',
-            price_per_kg=Decimal('10.00'),
-            approximate_weight=Decimal('0.100'),
+            **PRODUCT_1_PRICING,
             minimum_quantity=5
         )
         
-        self.product2 = Product.objects.create(
+        cls.product2 = Product.objects.create(
             name='Test Product 2',
             description='Test Description 2',
-            price_per_kg=Decimal('20.00'),
-            approximate_weight=Decimal('0.200'),
+            **PRODUCT_2_PRICING,
             minimum_quantity=3
         )
     
+    def setUp(self):
+        # Cached products outlive the test transaction they were loaded in
+        cache.clear()
+    
     def test_bulk_order_form_get(self):
         """Test bulk order form GET request."""
-        client = Client()
-        
         # Login the user
-        client.force_login(self.user)
+        self.client.force_login(self.user)
         
         # Make GET request to bulk order form
-        response = client.get(reverse('bulk_order_form'))
+        response = self.client.get(reverse('bulk_order_form'))
         
         # Check response
         self.assertEqual(response.status_code, 200)
@@ -933,10 +983,75 @@ class ViewTest(TestCase):
         # Check that quantities are empty for new order
         self.assertEqual(context['quantities'], {})
     
+    def test_bulk_order_form_customer_loaded_with_user(self):
+        """Test that the customer profile is joined to the session user instead of queried separately."""
+        self.client.force_login(self.user)
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('bulk_order_form'))
+        
+        self.assertEqual(response.context['customer'], self.customer)
+        self.assertFalse([q for q in queries if 'FROM "orders_customer"' in q['sql']])
+    
+    def test_bulk_order_form_without_customer_profile(self):
+        """Test that a user without a customer profile is refused."""
+        employee = User.objects.create(username='employee', password=TEST_PASSWORD_HASH, role='employee')
+        self.client.force_login(employee)
+        
+        response = self.client.get(reverse('bulk_order_form'))
+        
+        self.assertEqual(response.status_code, 401)
+    
+    def test_bulk_order_form_loads_products_once(self):
+        """Test that rendering the form reads the products once, without loading deferred fields."""
+        self.client.force_login(self.user)
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('bulk_order_form'))
+        
+        self.assertContains(response, self.product1.name)
+        product_queries = [q for q in queries if 'FROM "orders_product"' in q['sql']]
+        self.assertEqual(len(product_queries), 1)
+        self.assertNotIn('"orders_product"."description"', product_queries[0]['sql'])
+    
+    def test_bulk_order_form_caches_active_products(self):
+        """Test that active products are cached between requests until a product changes."""
+        self.client.force_login(self.user)
+        self.client.get(reverse('bulk_order_form'))
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('bulk_order_form'))
+        self.assertFalse([q for q in queries if 'FROM "orders_product"' in q['sql']])
+        
+        # The cached list is only dropped once the product change is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product2.is_active = False
+            self.product2.save()
+            self.assertIsNotNone(cache.get(ACTIVE_PRODUCTS_CACHE_KEY))
+        self.assertIsNone(cache.get(ACTIVE_PRODUCTS_CACHE_KEY))
+        response = self.client.get(reverse('bulk_order_form'))
+        self.assertEqual([product.id for product in response.context['all_active_products']], [self.product1.id])
+    
+    def test_bulk_order_form_last_order_quantities(self):
+        """Test that quantities from the last orders are loaded in one query for all products."""
+        older_order = Order.objects.create(customer=self.customer, delivery_date=date(2024, 1, 2))
+        newer_order = Order.objects.create(customer=self.customer, delivery_date=date(2024, 1, 5))
+        OrderItem.bulk_create_items(older_order, [(self.product1.id, 5), (self.product2.id, 3)])
+        OrderItem.bulk_create_items(newer_order, [(self.product2.id, 4)])
+        self.client.force_login(self.user)
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('bulk_order_form'))
+        
+        products = {product.id: product for product in response.context['all_active_products']}
+        self.assertEqual(products[self.product1.id].last_order_quantities, [0, 5])
+        self.assertEqual(products[self.product2.id].last_order_quantities, [4, 3])
+        order_item_queries = [q for q in queries if 'FROM "orders_orderitem"' in q['sql']]
+        self.assertEqual(len(order_item_queries), 1)
+    
     def test_bulk_order_form_post_new_order(self):
         """Test bulk order form POST request for new order."""
-        client = Client()
-        client.force_login(self.user)
+        self.client.force_login(self.user)
         
         # Get next delivery date
         _, _, next_delivery_date = self.customer.get_next_delivery_day_info()
@@ -947,31 +1062,49 @@ class ViewTest(TestCase):
             f'quantity_{self.product2.id}': '5',
         }
         
-        response = client.post(reverse('bulk_order_form'), post_data)
+        response = self.client.post(reverse('bulk_order_form'), post_data)
         
-        # Should redirect to success page
+        # Should redirect to the new order's success page
         self.assertEqual(response.status_code, 302)
-        self.assertTrue(response.url.startswith('/orders/bulk/success/'))
+        match = resolve(response.url)
+        self.assertEqual(match.url_name, 'bulk_order_success')
         
         # Check that order was created
-        order = Order.objects.filter(customer=self.customer).first()
-        self.assertIsNotNone(order)
+        order = Order.objects.prefetch_related('order_items').get(pk=match.kwargs['order_id'])
+        self.assertEqual(order.customer_id, self.customer.id)
         self.assertEqual(order.delivery_date, next_delivery_date.date())
         
         # Check that order items were created
-        order_items = order.order_items.all()
-        self.assertEqual(len(order_items), 2)
+        items = {item.product_id: item for item in order.order_items.all()}
+        self.assertEqual(len(items), 2)
         
         # Check quantities
-        product1_item = order_items.filter(product=self.product1).first()
-        product2_item = order_items.filter(product=self.product2).first()
-        self.assertEqual(product1_item.quantity, 10)
-        self.assertEqual(product2_item.quantity, 5)
+        self.assertEqual(items[self.product1.id].quantity, 10)
+        self.assertEqual(items[self.product2.id].quantity, 5)
+    
+    def test_bulk_order_form_post_ignores_other_fields(self):
+        """Test that empty, unknown and malformed quantity fields are skipped."""
+        self.client.force_login(self.user)
+        post_data = {
+            f'quantity_{self.product1.id}': '10',
+            f'quantity_{self.product2.id}': '',
+            'quantity_999999': '5',
+            'quantity_abc': 'x',
+            'notes': 'ignored',
+        }
+        
+        response = self.client.post(reverse('bulk_order_form'), post_data)
+        
+        self.assertEqual(response.status_code, 302)
+        order_id = resolve(response.url).kwargs['order_id']
+        self.assertEqual(
+            list(OrderItem.objects.filter(order_id=order_id).values_list('product_id', 'quantity')),
+            [(self.product1.id, 10)],
+        )
     
     def test_bulk_order_form_post_update_existing_order(self):
         """Test bulk order form POST request for updating existing order."""
-        client = Client()
-        client.force_login(self.user)
+        self.client.force_login(self.user)
         
         # Get next delivery date
         _, _, next_delivery_date = self.customer.get_next_delivery_day_info()
@@ -996,30 +1129,93 @@ class ViewTest(TestCase):
             f'quantity_{self.product2.id}': '8',   # New item
         }
         
-        response = client.post(reverse('bulk_order_form'), post_data)
+        response = self.client.post(reverse('bulk_order_form'), post_data)
         
-        # Should redirect to success page
-        self.assertEqual(response.status_code, 302)
-        self.assertTrue(response.url.startswith('/orders/bulk/success/'))
+        # Should redirect to the success page of the same order
+        self.assertRedirects(
+            response,
+            reverse('bulk_order_success', kwargs={'order_id': existing_order.id}),
+            fetch_redirect_response=False,
+        )
         
-        # Check that the same order was updated (not a new one created)
-        orders = Order.objects.filter(customer=self.customer)
-        self.assertEqual(orders.count(), 1)
+        # Check that no other order was created
+        self.assertEqual(Order.objects.filter(customer=self.customer).count(), 1)
         
         # Check that order items were updated
-        order_items = existing_order.order_items.all()
-        self.assertEqual(len(order_items), 2)
+        items = {item.product_id: item for item in existing_order.order_items.all()}
+        self.assertEqual(len(items), 2)
         
         # Check updated quantities
-        product1_item = order_items.filter(product=self.product1).first()
-        product2_item = order_items.filter(product=self.product2).first()
-        self.assertEqual(product1_item.quantity, 15)
-        self.assertEqual(product2_item.quantity, 8)
+        self.assertEqual(items[self.product1.id].quantity, 15)
+        self.assertEqual(items[self.product2.id].quantity, 8)
+    
+    def test_bulk_order_form_get_existing_order(self):
+        """Test that the form is pre-filled from the existing order with a single item query."""
+        _, _, next_delivery_date = self.customer.get_next_delivery_day_info()
+        existing_order = Order.objects.create(customer=self.customer, delivery_date=next_delivery_date.date())
+        OrderItem.bulk_create_items(existing_order, [(self.product1.id, 7)])
+        self.client.force_login(self.user)
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('bulk_order_form'))
+        
+        self.assertEqual(response.context['existing_order'], existing_order)
+        self.assertEqual(response.context['quantities'], {self.product1.id: 7, self.product2.id: 0})
+        order_item_queries = [
+            q for q in queries
+            if 'FROM "orders_orderitem"' in q['sql'] and '"orders_orderitem"."order_id" =' in q['sql']
+        ]
+        self.assertEqual(len(order_item_queries), 1)
+    
+    def test_bulk_order_form_post_order_created_concurrently(self):
+        """Test that an order created after the form loaded its data is updated, not duplicated."""
+        self.client.force_login(self.user)
+        _, _, next_delivery_date = self.customer.get_next_delivery_day_info()
+        concurrent_order = Order.objects.create(customer=self.customer, delivery_date=next_delivery_date.date())
+        
+        # The first lookup runs before the other request's order was committed
+        with mock.patch.object(Customer, 'get_existing_order_for_delivery_date',
+                               side_effect=[None, concurrent_order]):
+            response = self.client.post(reverse('bulk_order_form'), {f'quantity_{self.product1.id}': '10'})
+        
+        self.assertRedirects(
+            response,
+            reverse('bulk_order_success', kwargs={'order_id': concurrent_order.id}),
+            fetch_redirect_response=False,
+        )
+        self.assertEqual(Order.objects.filter(customer=self.customer).count(), 1)
+        self.assertEqual(concurrent_order.order_items.get().quantity, 10)
+    
+    def test_bulk_order_form_post_rejects_deactivated_product(self):
+        """Test that a product deactivated behind the product cache's back can't be ordered."""
+        self.client.force_login(self.user)
+        self.client.get(reverse('bulk_order_form'))
+        # update() sends no signal, so the cached list still has the product
+        Product.objects.filter(pk=self.product2.pk).update(is_active=False)
+        post_data = {f'quantity_{self.product1.id}': '10', f'quantity_{self.product2.id}': '5'}
+        
+        response = self.client.post(reverse('bulk_order_form'), post_data)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['errors'], {self.product2.id: 'No longer available'})
+        self.assertEqual(response.context['quantities'], {self.product1.id: '10', self.product2.id: '5'})
+        self.assertFalse(Order.objects.filter(customer=self.customer).exists())
+        self.assertIsNone(cache.get(ACTIVE_PRODUCTS_CACHE_KEY))
+    
+    def test_bulk_order_form_post_rolls_back_on_failure(self):
+        """Test that a failure while saving the items leaves no order behind."""
+        self.client.force_login(self.user)
+        post_data = {f'quantity_{self.product1.id}': '10'}
+        
+        with mock.patch.object(OrderItem, 'bulk_create_items', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                self.client.post(reverse('bulk_order_form'), post_data)
+        
+        self.assertFalse(Order.objects.filter(customer=self.customer).exists())
     
     def test_bulk_order_form_validation_error(self):
         """Test bulk order form POST with validation errors."""
-        client = Client()
-        client.force_login(self.user)
+        self.client.force_login(self.user)
         
         # Make POST request with quantity below minimum
         post_data = {
@@ -1027,7 +1223,7 @@ class ViewTest(TestCase):
             f'quantity_{self.product2.id}': '5',
         }
         
-        response = client.post(reverse('bulk_order_form'), post_data)
+        response = self.client.post(reverse('bulk_order_form'), post_data)
         
         # Should return form with errors (not redirect)
         self.assertEqual(response.status_code, 200)
@@ -1041,20 +1237,37 @@ class ViewTest(TestCase):
         # Check that no order was created
         self.assertEqual(Order.objects.count(), 0)
     
+    def test_login_redirects_by_role(self):
+        """Test that logging in sends each role to its landing page."""
+        expected = {
+            'customer': reverse('bulk_order_form'),
+            'employee': reverse('employee_dashboard'),
+            'admin': reverse('admin:index'),
+        }
+        for role, url in expected.items():
+            with self.subTest(role=role):
+                User.objects.create(username=f'login{role}', password=TEST_PASSWORD_HASH, role=role)
+                
+                response = self.client.post(
+                    reverse('login'), {'username': f'login{role}', 'password': 'testpass123'}
+                )
+                
+                self.assertRedirects(response, url, fetch_redirect_response=False)
+                self.client.logout()
+    
     def test_bulk_order_success_view(self):
         """Test bulk order success view."""
-        client = Client()
-        client.force_login(self.user)
+        self.client.force_login(self.user)
         
         # Create an order
         order = Order.objects.create(
             customer=self.customer,
-            delivery_date='2024-01-02',
+            delivery_date=date(2024, 1, 2),
             status='pending'
         )
         
         # Make GET request to success page
-        response = client.get(reverse('bulk_order_success', kwargs={'order_id': order.id}))
+        response = self.client.get(reverse('bulk_order_success', kwargs={'order_id': order.id}))
         
         # Check response
         self.assertEqual(response.status_code, 200)
@@ -1065,39 +1278,217 @@ class ViewTest(TestCase):
         self.assertIn('order', context)
         self.assertEqual(context['order'], order)
     
+    def test_bulk_order_success_view_queries(self):
+        """Test that the success page loads the order, its totals and its items without per-item queries."""
+        self.client.force_login(self.user)
+        order = Order.objects.create(customer=self.customer, delivery_date=date(2024, 1, 2))
+        OrderItem.bulk_create_items(order, [(self.product1.id, 5), (self.product2.id, 3)])
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('bulk_order_success', kwargs={'order_id': order.id}))
+        
+        self.assertContains(response, '8 items')
+        self.assertContains(response, self.product2.name)
+        order_queries = [q for q in queries if '"orders_' in q['sql'] and '"orders_user"' not in q['sql']]
+        self.assertEqual(len(order_queries), 3)  # Order with customer, items, products
+    
+    def test_bulk_order_success_missing_order(self):
+        """Test that an unknown order id gives a 404."""
+        self.client.force_login(self.user)
+        
+        response = self.client.get(reverse('bulk_order_success', kwargs={'order_id': 999999}))
+        
+        self.assertEqual(response.status_code, 404)
+    
     def test_bulk_order_success_unauthorized_access(self):
         """Test bulk order success view with unauthorized access."""
-        client = Client()
-        client.force_login(self.user)
+        self.client.force_login(self.user)
         
         # Create another user and customer
-        other_user = User.objects.create_user(
-            username='otheruser',
-            email='other@testsupermarket.be',
-            password='testpass123',
-            role='customer'
-        )
-        
-        other_customer = Customer.objects.create(
-            user=other_user,
-            customer_number='CUST007',
+        _, other_customer = create_customer(
+            'otheruser',
             company_name='Other Supermarket',
             address='456 Other Street, Brussels',
-            vat_number='0123456796',
-            contact_person='Jane Doe',
-            phone_number='+32 2 123 45 73'
+            contact_person='Jane Doe'
         )
         
         # Create an order for the other customer
         other_order = Order.objects.create(
             customer=other_customer,
-            delivery_date='2024-01-02',
+            delivery_date=date(2024, 1, 2),
             status='pending'
         )
         
         # Try to access the other customer's order
-        response = client.get(reverse('bulk_order_success', kwargs={'order_id': other_order.id}))
+        response = self.client.get(reverse('bulk_order_success', kwargs={'order_id': other_order.id}))
         
         # Should redirect to bulk order form (unauthorized)
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response.url, reverse('bulk_order_form'))
+
+
+class AdminChangeListTest(TestCase):
+    """Test cases for the admin change lists."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Set up an admin user and a handful of orders with items."""
+        cls.admin_user = User.objects.create(
+            username='adminuser',
+            email='admin@freshconcept.be',
+            password=TEST_PASSWORD_HASH,
+            is_staff=True,
+            is_superuser=True
+        )
+        
+        _, cls.customer = create_customer(
+            'adminlistuser',
+            company_name='Admin Supermarket',
+            address='789 Admin Street, Brussels'
+        )
+        
+        cls.product = Product.objects.create(
+            name='Test Product',
+            description='Test Description',
+            **PRODUCT_1_PRICING,
+            minimum_quantity=1
+        )
+        
+        for day in range(1, 6):
+            order = Order.objects.create(
+                customer=cls.customer,
+                delivery_date=date(2024, 1, day),
+                status='pending'
+            )
+            OrderItem.objects.create(order=order, product=cls.product, quantity=day)
+    
+    def test_customer_change_list_delivery_days(self):
+        """Test that delivery days are rendered from the keys extracted by the database."""
+        self.customer.delivery_schedule = {
+            '4': ['3', '08:00'],  # Friday delivery, order by Thursday 8 AM
+            '1': ['0', '08:00']   # Tuesday delivery, order by Monday 8 AM
+        }
+        self.customer.save()
+        self.client.force_login(self.admin_user)
+        
+        response = self.client.get(reverse('admin:orders_customer_changelist'))
+        self.assertContains(response, 'Tuesday, Friday')
+    
+    def test_customer_change_list_non_object_schedule(self):
+        """Test that schedules stored as a JSON array or scalar don't break the change list."""
+        create_customer(delivery_schedule=['1', '4'])
+        create_customer(delivery_schedule=5)
+        self.client.force_login(self.admin_user)
+        
+        response = self.client.get(reverse('admin:orders_customer_changelist'))
+        
+        self.assertContains(response, 'No delivery days set', count=3)
+    
+    def test_customer_change_list_unknown_day_keys(self):
+        """Test that schedule keys outside 0-6 are skipped instead of breaking the change list."""
+        create_customer(company_name='Odd Keys Supermarket', delivery_schedule={
+            '9': ['0', '08:00'], 'x': ['0', '08:00'], '2': ['1', '08:00'],
+        })
+        create_customer(company_name='Only Odd Keys Supermarket', delivery_schedule={'12': ['0', '08:00']})
+        self.client.force_login(self.admin_user)
+        
+        response = self.client.get(reverse('admin:orders_customer_changelist'))
+        
+        self.assertContains(response, '<td class="field-delivery_schedule_display">Wednesday</td>', html=True)
+        self.assertContains(response, 'No delivery days set', count=2)
+    
+    def test_customer_change_form_loads_schedule_with_customer(self):
+        """Test that the change form doesn't defer the delivery schedule it edits."""
+        self.client.force_login(self.admin_user)
+        url = reverse('admin:orders_customer_change', args=[self.customer.pk])
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, 200)
+        customer_queries = [q for q in queries if 'FROM "orders_customer"' in q['sql']]
+        self.assertEqual(len(customer_queries), 1)
+    
+    def test_estimated_count_paginator_exact_fallback(self):
+        """Test that the paginator counts exactly when no estimate is available."""
+        paginator = EstimatedCountPaginator(Order.objects.all(), 2)
+        self.assertEqual(paginator.count, 5)
+        self.assertEqual(paginator.num_pages, 3)
+        
+        paginator = EstimatedCountPaginator(Order.objects.filter(delivery_date__gte=date(2024, 1, 4)), 2)
+        self.assertEqual(paginator.count, 2)
+    
+    def test_change_list_totals_are_annotated(self):
+        """Test that order totals come from the change list query, not one query per row."""
+        self.client.force_login(self.admin_user)
+        url = reverse('admin:orders_order_changelist')
+        
+        # Warm up session/permission caches so only the change list queries are counted
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<td class="field-get_total_items">5</td>')
+        
+        # Adding more orders must not add queries
+        order = Order.objects.create(
+            customer=self.customer,
+            delivery_date=date(2024, 1, 6),
+            status='pending'
+        )
+        OrderItem.objects.create(order=order, product=self.product, quantity=6)
+        with self.assertNumQueries(len(queries)):
+            self.client.get(url)
+    
+    def test_change_list_count_skips_order_items(self):
+        """Test that counting the order change list doesn't join the order items for the totals."""
+        self.client.force_login(self.admin_user)
+        url = reverse('admin:orders_order_changelist')
+        
+        for params in ({}, {'status__exact': 'pending'}, {'o': '-5'}):
+            with self.subTest(params=params):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url, params)
+                
+                self.assertEqual(response.status_code, 200)
+                count_queries = [q['sql'] for q in queries if q['sql'].startswith('SELECT COUNT(')]
+                self.assertTrue(count_queries)
+                for sql in count_queries:
+                    self.assertNotIn('orders_orderitem', sql)
+    
+    def test_order_item_change_list_query_count(self):
+        """Test that the order item change list joins orders, customers and products."""
+        self.client.force_login(self.admin_user)
+        url = reverse('admin:orders_orderitem_changelist')
+        
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        
+        product = Product.objects.create(
+            name='Another Product',
+            description='Another Description',
+            **PRODUCT_2_PRICING,
+            minimum_quantity=1
+        )
+        OrderItem.objects.create(order=Order.objects.first(), product=product, quantity=2)
+        with self.assertNumQueries(len(queries)):
+            self.client.get(url)
+
+
+class TestSuiteGuardTest(SimpleTestCase):
+    """Guard against test classes that truncate tables between tests."""
+    
+    def test_database_tests_roll_back_with_savepoints(self):
+        """Test that every database test class is a TestCase, not a bare TransactionTestCase."""
+        database_test_classes = [
+            obj for obj in globals().values()
+            if isinstance(obj, type) and issubclass(obj, TransactionTestCase) and obj.__module__ == __name__
+        ]
+        self.assertIn(CustomerModelTest, database_test_classes)
+        for test_class in database_test_classes:
+            with self.subTest(test_class=test_class.__name__):
+                # TestCase subclasses TransactionTestCase but rolls back instead of flushing
+                self.assertTrue(issubclass(test_class, TestCase))
@@ -1,23 +1,26 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import get_object_or_404, render, redirect
 from django.http import HttpResponse
 from django.contrib.auth.decorators import login_required
-from .models import Customer, Order, Product, OrderItem
-from datetime import datetime
+from django.db import transaction
+from .caching import clear_active_products, get_active_products
+from .models import Customer, Order, OrderItem, Product
 from django.contrib.auth.views import LoginView
-from django.urls import reverse
+from django.urls import reverse_lazy
+
+# Landing page of each user role after logging in
+ROLE_REDIRECTS = {
+    'customer': reverse_lazy('bulk_order_form'),
+    'employee': reverse_lazy('employee_dashboard'),
+    'admin': reverse_lazy('admin:index'),
+}
 
 class RoleBasedLoginView(LoginView):
     template_name = 'registration/login.html'
 
     def get_success_url(self):
-        user = self.request.user
-        if hasattr(user, 'role'):
-            if user.role == 'customer':
-                return reverse('bulk_order_form')
-            elif user.role == 'employee':
-                return reverse('employee_dashboard')
-            elif user.role == 'admin':
-                return reverse('admin:index')
+        url = ROLE_REDIRECTS.get(getattr(self.request.user, 'role', None))
+        if url:
+            return str(url)
         return super().get_success_url()
 
     def dispatch(self, request, *args, **kwargs):
@@ -33,16 +36,23 @@ def bulk_order_form(request):
     except Customer.DoesNotExist:
         return HttpResponse('Unauthorized', status=401)
 
-    all_active_products = Product.objects.filter(is_active=True)
+    all_active_products = get_active_products()
     last_orders = list(Order.objects.filter(customer=customer).order_by('-order_date').values('id', 'order_date')[:3])
     order_ids = [o['id'] for o in last_orders]
     order_dates = [o['order_date'] for o in last_orders]
+    # Quantities of every product in the last orders, fetched in one query
+    last_quantities = {
+        (product_id, order_id): quantity
+        for product_id, order_id, quantity in OrderItem.objects.filter(
+            order_id__in=order_ids,
+        ).values_list('product_id', 'order_id', 'quantity')
+    }
     for product in all_active_products:
-        product.last_order_quantities = product.quantities_for_orders(order_ids)
+        product.last_order_quantities = [last_quantities.get((product.id, order_id), 0) for order_id in order_ids]
         # Calculate margin percentage for display
         product.margin_percentage = int(float(product.margin_rate) * 100)
 
-    _, next_delivery_day_name, next_delivery_date = customer.get_next_delivery_day_info()
+    _, next_delivery_day_name, next_delivery_date = customer.next_delivery_info
 
     # Check if there's an existing order for the next delivery date
     existing_order = None
@@ -53,17 +63,28 @@ def bulk_order_form(request):
     quantities = {}
 
     if request.method == 'POST':
-        # Collect quantities and validate
-        for product in all_active_products:
-            key = f'quantity_{product.id}'
-            value = request.POST.get(key)
+        # Only the filled-in quantity fields of active products are parsed
+        products_by_id = {product.id: product for product in all_active_products}
+        submitted = {}
+        for key, value in request.POST.items():
+            product_id = key.removeprefix('quantity_')
+            if value and product_id != key and product_id.isdecimal() and int(product_id) in products_by_id:
+                submitted[int(product_id)] = value
+
+        # Collect quantities and validate, keeping the order items to save
+        items = []
+        for product_id, value in submitted.items():
+            product = products_by_id[product_id]
             quantities[product.id] = value  # Save entered value for re-rendering
             try:
-                quantity = int(value) if value else 0
-                if quantity > 0 and quantity < product.minimum_quantity:
-                    errors[product.id] = f"Minimum: {product.minimum_quantity}"
-            except (TypeError, ValueError):
+                quantity = int(value)
+            except ValueError:
                 errors[product.id] = "Invalid number"
+                continue
+            if quantity > 0 and quantity < product.minimum_quantity:
+                errors[product.id] = f"Minimum: {product.minimum_quantity}"
+            elif quantity > 0:
+                items.append((product.id, quantity))
 
         if errors:
             context = {
@@ -81,48 +102,57 @@ def bulk_order_form(request):
         errors = {}
         quantities = {}
 
-        # Check if we're updating an existing order or creating a new one
-        if existing_order:
-            # Update existing order
-            order = existing_order
-            # Clear existing order items
-            order.order_items.all().delete()
-            order.save()
-        else:
-            # Create new order
-            if not next_delivery_date:
-                # If no delivery date available, redirect back with error
-                context = {
-                    'customer': customer,
-                    'all_active_products': all_active_products,
-                    'order_dates': order_dates,
-                    'errors': {'general': 'No delivery date available. Please contact support.'},
-                    'quantities': quantities,
-                    'next_delivery_day_name': next_delivery_day_name,
-                    'next_delivery_date': next_delivery_date,
-                }
-                return render(request, 'orders/bulk_order_form.html', context)
-            
-            order = Order.objects.create(
-                customer=customer,
-                order_date=datetime.now(),
-                delivery_date=next_delivery_date.date(),
-            )
+        if not next_delivery_date:
+            # If no delivery date available, redirect back with error
+            context = {
+                'customer': customer,
+                'all_active_products': all_active_products,
+                'order_dates': order_dates,
+                'errors': {'general': 'No delivery date available. Please contact support.'},
+                'quantities': quantities,
+                'next_delivery_day_name': next_delivery_day_name,
+                'next_delivery_date': next_delivery_date,
+            }
+            return render(request, 'orders/bulk_order_form.html', context)
 
-        # Create or update order items
-        for product in all_active_products:
-            key = f'quantity_{product.id}'
-            value = request.POST.get(key)
-            try:
-                quantity = int(value) if value else 0
-            except (TypeError, ValueError):
-                continue  # Should not happen if validated above
-            if quantity > 0:
-                OrderItem.objects.create(
-                    order=order,
-                    product=product,
-                    quantity=quantity,
-                )
+        # Write the order and its items in a single transaction
+        with transaction.atomic():
+            # Lock the customer so concurrent submissions for it run one at a time, then
+            # look the order up again: another request may have created or deleted it
+            Customer.objects.select_for_update().only('pk').get(pk=customer.pk)
+            order = customer.get_existing_order_for_delivery_date(next_delivery_date.date())
+            # The cached product list can be stale, so check the products are still active
+            product_ids = [product_id for product_id, _ in items]
+            inactive_ids = set(product_ids) - set(
+                Product.objects.filter(is_active=True, pk__in=product_ids).values_list('pk', flat=True)
+            )
+            if not inactive_ids:
+                # Check if we're updating an existing order or creating a new one
+                if order:
+                    # Only write the items that changed
+                    OrderItem.replace_items(order, items)
+                    order.save()
+                else:
+                    # Create new order
+                    order = Order.objects.create(
+                        customer=customer,
+                        delivery_date=next_delivery_date.date(),
+                    )
+                    OrderItem.bulk_create_items(order, items)
+
+        if inactive_ids:
+            # Make the next request reload the products
+            clear_active_products()
+            context = {
+                'customer': customer,
+                'all_active_products': all_active_products,
+                'order_dates': order_dates,
+                'errors': {product_id: "No longer available" for product_id in inactive_ids},
+                'quantities': submitted,
+                'next_delivery_day_name': next_delivery_day_name,
+                'next_delivery_date': next_delivery_date,
+            }
+            return render(request, 'orders/bulk_order_form.html', context)
         
         # Redirect to success page to prevent form re-rendering with old data
         return redirect('bulk_order_success', order_id=order.id)
@@ -130,12 +160,9 @@ def bulk_order_form(request):
     # GET request - pre-fill form with existing order data if available
     if existing_order:
         # Pre-fill quantities from existing order
+        existing_quantities = dict(existing_order.order_items.values_list('product_id', 'quantity'))
         for product in all_active_products:
-            try:
-                order_item = existing_order.order_items.get(product=product)
-                quantities[product.id] = order_item.quantity
-            except OrderItem.DoesNotExist:
-                quantities[product.id] = 0
+            quantities[product.id] = existing_quantities.get(product.id, 0)
     else:
         quantities = {}  # Empty quantities for new order
 
@@ -153,8 +180,12 @@ def bulk_order_form(request):
 
 @login_required
 def bulk_order_success(request, order_id):
-    order = Order.objects.get(id=order_id)
-    if not order or order.customer != request.user.customer_profile:
+    order = get_object_or_404(
+        Order.objects.with_totals().select_related('customer').prefetch_related('order_items__product'),
+        pk=order_id,
+    )
+    # Compare ids so the user's customer profile doesn't have to be loaded
+    if order.customer.user_id != request.user.pk:
         return redirect('bulk_order_form')
     return render(request, 'orders/bulk_order_success.html', {'order': order})
 